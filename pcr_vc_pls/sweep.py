@@ -0,0 +1,190 @@
+"""Monte Carlo parameter sweeps for the PCR vs PLS study (see plot_pcr_vs_pls.ipynb)
+
+Each draw reproduces the notebook experiment:
+* X ~ N(0, cov), with n_samples samples and 2 features
+* y = X . (second PCA component of X) + y_noise * N(0, 1)
+* train/test split (75% / 25%)
+* r-squared on the test set of PCR and PLS, with 1 and 2 components
+
+Instead of fitting sklearn pipelines draw by draw, many draws are generated as stacked arrays (n_draws, n_samples, 2),
+and the fits are computed in closed form with batched numpy operations:
+* PCR (StandardScaler + PCA(k) + LinearRegression): regression of y on the top k eigenvectors of the scaled train data
+* PLS (PLSRegression(k), one target): with 1 component, regression of y on X_scaled . w, where w ~ X_scaled' y
+* with 2 components (i.e. as many as features), PCR and PLS are both equivalent to an ordinary least squares fit
+
+The grid cells are split into chunks, which are computed in a process pool.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from numpy.typing import NDArray
+
+
+Covariance = Sequence[Sequence[float]]  # 2x2 covariance matrix
+Batch = NDArray[np.float64]  # stacked arrays, the first axis is the draw
+
+TEST_SIZE = 0.25  # as in train_test_split
+SCORE_COLUMNS = ["pcr_1", "pls_1", "pcr_2", "pls_2"]
+
+
+def make_datasets(
+        rng: np.random.Generator, n_draws: int, n_samples: int, cov: Covariance, y_noise: float
+        ) -> tuple[Batch, Batch]:
+    """Generate n_draws datasets. Returns X (n_draws, n_samples, 2) and y (n_draws, n_samples)"""
+    cholesky = np.linalg.cholesky(np.asarray(cov, dtype=np.float64))
+    X = rng.standard_normal((n_draws, n_samples, 2)) @ cholesky.T
+    # Second PCA component of each dataset: eigh sorts the eigenvalues in ascending order,
+    # so with 2 features, the eigenvector of the smallest one comes first
+    X_centered = X - X.mean(axis=1, keepdims=True)
+    _, eigenvectors = np.linalg.eigh(X_centered.transpose(0, 2, 1) @ X_centered)
+    second_component = eigenvectors[:, :, 0]
+    y = np.einsum("dnf,df->dn", X, second_component) + rng.standard_normal((n_draws, n_samples)) * y_noise
+    return X, y
+
+
+def _r2_score(y_true: Batch, y_pred: Batch) -> NDArray[np.float64]:
+    residuals = ((y_true - y_pred) ** 2).sum(axis=1)
+    total = ((y_true - y_true.mean(axis=1, keepdims=True)) ** 2).sum(axis=1)
+    return 1 - residuals / total
+
+
+def _regress_on_scores(t_train: Batch, y_train_centered: Batch, t_test: Batch, y_train_mean: Batch) -> Batch:
+    """Fit y on a single (centered) score per draw, and predict the test set"""
+    coef = (t_train * y_train_centered).sum(axis=1) / (t_train ** 2).sum(axis=1)
+    return t_test * coef[:, np.newaxis] + y_train_mean
+
+
+def fit_and_score(X: Batch, y: Batch) -> dict[str, NDArray[np.float64]]:
+    """Test r-squared of PCR and PLS with 1 and 2 components, for each draw (the last samples are the test set)"""
+    n_samples = X.shape[1]
+    n_test = int(np.ceil(TEST_SIZE * n_samples))
+    X_train, X_test = X[:, :-n_test], X[:, -n_test:]
+    y_train, y_test = y[:, :-n_test], y[:, -n_test:]
+
+    X_mean = X_train.mean(axis=1, keepdims=True)
+    y_mean = y_train.mean(axis=1, keepdims=True)
+    X_train_centered = X_train - X_mean
+    X_test_centered = X_test - X_mean
+    y_train_centered = y_train - y_mean
+    # Feature scaling, with the same std for the train and test sets.
+    # (StandardScaler uses ddof=0, PLSRegression ddof=1: this only changes a factor common to all features,
+    # which does not change the PCA and PLS directions)
+    X_std = X_train.std(axis=1, keepdims=True)
+    X_train_scaled = X_train_centered / X_std
+    X_test_scaled = X_test_centered / X_std
+
+    # PCR, 1 component: first eigenvector of the scaled train data (the last one, in ascending order)
+    _, eigenvectors = np.linalg.eigh(X_train_scaled.transpose(0, 2, 1) @ X_train_scaled)
+    first_component = eigenvectors[:, :, -1]
+    pcr_1_pred = _regress_on_scores(
+        np.einsum("dnf,df->dn", X_train_scaled, first_component),
+        y_train_centered,
+        np.einsum("dnf,df->dn", X_test_scaled, first_component),
+        y_mean)
+
+    # PLS, 1 component: the weights are the covariance between the scaled features and the target
+    # (their norm does not matter, since the target is then regressed on the scores)
+    pls_weights = np.einsum("dnf,dn->df", X_train_scaled, y_train_centered)
+    pls_1_pred = _regress_on_scores(
+        np.einsum("dnf,df->dn", X_train_scaled, pls_weights),
+        y_train_centered,
+        np.einsum("dnf,df->dn", X_test_scaled, pls_weights),
+        y_mean)
+
+    # 2 components: ordinary least squares
+    gram = X_train_centered.transpose(0, 2, 1) @ X_train_centered
+    xy = np.einsum("dnf,dn->df", X_train_centered, y_train_centered)
+    ols_coef = np.linalg.solve(gram, xy[:, :, np.newaxis])[:, :, 0]
+    ols_pred = np.einsum("dnf,df->dn", X_test_centered, ols_coef) + y_mean
+    ols_r2 = _r2_score(y_test, ols_pred)
+
+    return {
+        "pcr_1": _r2_score(y_test, pcr_1_pred),
+        "pls_1": _r2_score(y_test, pls_1_pred),
+        "pcr_2": ols_r2,
+        "pls_2": ols_r2.copy(),
+    }
+
+
+def _run_chunk(
+        seed: np.random.SeedSequence, n_draws: int, n_samples: int, cov: Covariance, y_noise: float
+        ) -> dict[str, NDArray[np.float64]]:
+    rng = np.random.default_rng(seed)
+    X, y = make_datasets(rng, n_draws, n_samples, cov, y_noise)
+    return fit_and_score(X, y)
+
+
+def run_sweep(
+        y_noises: Sequence[float] = (0.25, 0.5, 1.0),
+        covs: Sequence[Covariance] = ([[3, 3], [3, 4]],),
+        n_samples_list: Sequence[int] = (500,),
+        n_draws: int = 1000,
+        chunk_size: int = 500,
+        max_workers: int | None = None,
+        seed: int = 0) -> pd.DataFrame:
+    """Run n_draws experiments for each (y_noise, cov, n_samples) of the grid.
+
+    Returns a DataFrame with one row per draw: the grid parameters ("cov" is the index in covs),
+    and the test r-squared of each model (see SCORE_COLUMNS).
+    """
+    for cov in covs:
+        np.linalg.cholesky(np.asarray(cov, dtype=np.float64))  # raises LinAlgError if not positive definite
+
+    chunks = []  # (y_noise, cov_idx, n_samples, n_draws_in_chunk)
+    for y_noise, cov_idx, n_samples in product(y_noises, range(len(covs)), n_samples_list):
+        for start in range(0, n_draws, chunk_size):
+            chunks.append((y_noise, cov_idx, n_samples, min(chunk_size, n_draws - start)))
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_run_chunk, chunk_seed, chunk_draws, n_samples, covs[cov_idx], y_noise)
+            for chunk_seed, (y_noise, cov_idx, n_samples, chunk_draws) in zip(seeds, chunks)
+        ]
+        frames = []
+        for future, (y_noise, cov_idx, n_samples, chunk_draws) in zip(futures, chunks):
+            frame = pd.DataFrame(future.result())
+            frame.insert(0, "y_noise", y_noise)
+            frame.insert(1, "cov", cov_idx)
+            frame.insert(2, "n_samples", n_samples)
+            frames.append(frame)
+
+    return pd.concat(frames, ignore_index=True)[["y_noise", "cov", "n_samples"] + SCORE_COLUMNS]
+
+
+def summarize_sweep(results: pd.DataFrame) -> pd.DataFrame:
+    """Distribution of the r-squared per grid cell: mean and quantiles of each model,
+    and how often PLS beats PCR with 1 component"""
+    grouped = results.assign(pls_beats_pcr=results["pls_1"] > results["pcr_1"]).groupby(["y_noise", "cov", "n_samples"])
+    r = grouped[SCORE_COLUMNS].describe(percentiles=[0.05, 0.5, 0.95])
+    r[("pls_beats_pcr", "rate")] = grouped["pls_beats_pcr"].mean()
+    return r
+
+
+def plot_sweep_heatmap(results: pd.DataFrame, n_samples: int | None = None) -> Figure:
+    """Heatmap of the rate at which PLS beats PCR (1 component), over y_noise and cov
+    (for a given n_samples, by default the first one)"""
+    if n_samples is None:
+        n_samples = int(results["n_samples"].iloc[0])
+    cell_results = results[results["n_samples"] == n_samples]
+    rates = (
+        (cell_results["pls_1"] > cell_results["pcr_1"])
+        .groupby([cell_results["cov"], cell_results["y_noise"]])
+        .mean()
+        .unstack("y_noise")
+    )
+
+    figure = Figure(figsize=(6, 4))
+    ax = figure.subplots()
+    image = ax.imshow(rates.values, vmin=0, vmax=1, cmap="viridis", aspect="auto")
+    ax.set_xticks(range(len(rates.columns)), [f"{v:g}" for v in rates.columns])
+    ax.set_yticks(range(len(rates.index)), [str(v) for v in rates.index])
+    ax.set(xlabel="y_noise", ylabel="cov (index)", title=f"PLS beats PCR (1 component), n_samples={n_samples}")
+    for (i, j), rate in np.ndenumerate(rates.values):
+        ax.text(j, i, f"{rate:.2f}", ha="center", va="center", color="w" if rate < 0.5 else "k")
+    figure.colorbar(image, ax=ax, label="rate")
+    return figure
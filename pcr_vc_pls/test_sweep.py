@@ -0,0 +1,41 @@
+"""Check the closed form fits of sweep.py against the sklearn models of the notebook (run with pytest)"""
+import numpy as np
+import pytest
+from sklearn.cross_decomposition import PLSRegression
+from sklearn.decomposition import PCA
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import r2_score
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from pcr_vc_pls.sweep import TEST_SIZE, fit_and_score, make_datasets
+
+
+def _sklearn_scores(X: np.ndarray, y: np.ndarray) -> dict[str, float]:
+    """Test r-squared of the notebook models, with the train/test split of fit_and_score (the last samples)"""
+    n_test = int(np.ceil(TEST_SIZE * len(X)))
+    X_train, X_test = X[:-n_test], X[-n_test:]
+    y_train, y_test = y[:-n_test], y[-n_test:]
+    r = {}
+    for n_components in (1, 2):
+        pcr = make_pipeline(StandardScaler(), PCA(n_components=n_components), LinearRegression())
+        pcr.fit(X_train, y_train)
+        r[f"pcr_{n_components}"] = r2_score(y_test, pcr.predict(X_test))
+        pls = PLSRegression(n_components=n_components)
+        pls.fit(X_train, y_train)
+        r[f"pls_{n_components}"] = r2_score(y_test, pls.predict(X_test).ravel())
+    return r
+
+
+@pytest.mark.parametrize("n_samples, cov, y_noise", [
+    (500, [[3, 3], [3, 4]], 1.0),
+    (100, [[3, 3], [3, 4]], 0.25),
+    (200, [[1, 0.2], [0.2, 2]], 0.5),
+])
+def test_fit_and_score_matches_sklearn(n_samples: int, cov: list[list[float]], y_noise: float) -> None:
+    X, y = make_datasets(np.random.default_rng(0), 5, n_samples, cov, y_noise)
+    scores = fit_and_score(X, y)
+    for draw in range(len(X)):
+        expected = _sklearn_scores(X[draw], y[draw])
+        for column, expected_score in expected.items():
+            np.testing.assert_allclose(scores[column][draw], expected_score, atol=1e-6, err_msg=column)
@@ -0,0 +1,57 @@
+"""Live monitor demo: a background producer streams 2D points into the scatter widget.
+
+The producer writes json lines into a pipe (as a remote service would do through a local socket),
+and the ScatterStream reads them in a background thread.
+"""
+import json
+import os
+import threading
+import time
+
+import numpy as np
+from imgui_bundle import immapp, hello_imgui, imgui
+from scatter_widget_bundle import ScatterData, ScatterPresenter, ScatterStream
+
+
+POINTS_PER_SECOND = 100_000
+BATCHES_PER_SECOND = 100
+
+
+def produce_points(pipe_out) -> None:  # type: ignore
+    """Emit gaussian blobs which slowly drift (this simulates a running service)"""
+    rng = np.random.default_rng()
+    batch_size = POINTS_PER_SECOND // BATCHES_PER_SECOND
+    centers = {"a": np.array([0.3, 0.3]), "b": np.array([0.7, 0.6]), "c": np.array([0.4, 0.8])}
+    t = 0.0
+    while True:
+        for name, center in centers.items():
+            drift = 0.2 * np.array([np.cos(t), np.sin(t)])
+            points = center + drift + 0.05 * rng.standard_normal((batch_size // len(centers), 2))
+            pipe_out.write(json.dumps({"cluster": name, "points": points.tolist()}) + "\n")
+        pipe_out.flush()
+        t += 0.01
+        time.sleep(1 / BATCHES_PER_SECOND)
+
+
+def main() -> None:
+    read_fd, write_fd = os.pipe()
+    pipe_in = os.fdopen(read_fd, "r")
+    pipe_out = os.fdopen(write_fd, "w")
+
+    stream = ScatterStream(retention=20_000)
+    stream.feed_from_lines(pipe_in)
+    threading.Thread(target=produce_points, args=(pipe_out,), daemon=True).start()
+
+    scatter_presenter = ScatterPresenter(ScatterData())
+    scatter_presenter.attach_stream(stream)
+
+    def gui() -> None:
+        scatter_presenter.gui()
+        imgui.text(f"FPS: {hello_imgui.frame_rate()}")
+
+    immapp.run(gui, window_size=(800, 1000), fps_idle=0)
+    stream.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -24,36 +24,31 @@ Quick user instructions
 # Part 1: imports
 # ---------------
 import matplotlib ; matplotlib.use("Agg")  # setup step needed to integrate matplotlib in Fiatlight
-import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
-from sklearn.linear_model import LogisticRegression
-from sklearn.inspection import DecisionBoundaryDisplay
-from sklearn.tree import DecisionTreeClassifier
 
-import numpy as np
-from enum import Enum
 import pandas as pd
 import time
 
 # Specific imports for fiatlight
 import fiatlight as fl
 from scatter_widget_bundle import ScatterData
+from scatter_widget_bundle.decision_boundary import DecisionStrategy, BackgroundBoundaryPlot
+from scatter_widget_bundle.strategy_comparison import StrategyComparison
 
 
 # Part 2: define the functions we want to use in the application
 # --------------------------------------------------------------
-# i. An enum used by plot_boundary to choose between logistic regression and decision tree
-#    (Fiatlight will automatically convert this to radio buttons in the UI)
-class DecisionStrategy(Enum):
-    """This is a simple enum to choose between logistic regression and decision tree
-    Fiatlight will automatically convert this to radio buttons in the UI
-    """
-    logistic_regression = LogisticRegression
-    decision_tree = DecisionTreeClassifier
+# i. DecisionStrategy is an enum used by plot_boundary to choose between logistic regression and decision tree
+#    (Fiatlight will automatically convert this to radio buttons in the UI).
+#    It is defined in scatter_widget_bundle.decision_boundary, together with the plotting code,
+#    so that the headless batch renderer (scatter_widget_bundle.batch_render) produces the same images.
 
 
 # ii. Below, we define a function that will plot the decision boundary of a classifier on a 2D dataset
 #    It is decorated with `@fl.with_fiat_attributes`, where we specify the UI options
+boundary_plot = BackgroundBoundaryPlot()  # approximate while drawing large datasets, refined when idle
+
+
 @fl.with_fiat_attributes(
     label = "Plot decision boundaries",  # label of the node in the UI
     strategy__label = "Choose strategy",  # label of the strategy argument in the UI
@@ -71,30 +66,44 @@ def plot_boundary(
     * strategy is a DecisionStrategy enum (choose between logistic regression and decision tree)
     * eps is the step size in the meshgrid
 
+    Large datasets are first plotted with an approximation (the title says so), and refined in the background
+    with all the points when the data stops changing (see BackgroundBoundaryPlot, and plot_boundary_gui below).
+
     It is decorated with `@fl.with_fiat_attributes(eps__range = (0.01, 10))` which means that the
     eps argument will be exposed in the UI as a slider with a range from 0.01 to 10.
     """
-    if len(df) and (df['color'].nunique() > 1):
-        X = df[['x', 'y']].values
-        y = df['color']
-        fig, ax = plt.subplots()
-        if strategy == DecisionStrategy.logistic_regression:
-            classifier = LogisticRegression().fit(X, y)
-        else:
-            classifier = DecisionTreeClassifier().fit(X, y)
-        disp = DecisionBoundaryDisplay.from_estimator(
-            classifier, X,
-            response_method="predict_proba" if len(np.unique(df['color'])) == 2 else "predict",
-            xlabel="x", ylabel="y",
-            # alpha=0.5,
-            eps=eps,
-            ax=ax
-        )
-        disp.ax_.scatter(X[:, 0], X[:, 1], c=y, edgecolor="k")
-        ax.set_title(f"{classifier.__class__.__name__}")
-        return fig
-    else:
-        return None
+    return boundary_plot.plot(df, strategy, eps)
+
+
+# The node is invoked again when the background full fidelity fit is ready:
+# on_heartbeat is called at each frame, and returns True when the node output needs to be updated.
+plot_boundary_gui = fl.FunctionWithGui(plot_boundary)
+plot_boundary_gui.on_heartbeat = boundary_plot.poll
+
+
+# iii. Compare all the strategies side by side
+#    Besides the DecisionStrategy members, decision_boundary registers additional strategies (kNN, RBF SVC).
+#    They are all fitted in parallel (in worker threads), and displayed in a GUI node as soon as they are ready.
+#    The evaluations only run while that GUI node is displayed, once the data stopped changing.
+strategy_comparison = StrategyComparison()
+
+
+@fl.with_fiat_attributes(
+    label = "Compare all strategies",
+    eps__label = "Epsilon value",
+    eps__range=(0.01, 10)
+)
+def compare_strategies(df: pd.DataFrame, eps: float = 0.1) -> None:
+    """Fit all the strategies in parallel, on the same data.
+    The results are displayed in the "show_strategy_comparison" node, as soon as they arrive.
+    """
+    strategy_comparison.eps = eps
+    strategy_comparison.submit(df)
+
+
+def show_strategy_comparison() -> None:
+    """Decision boundaries of all the strategies, with their fit/predict timings and cross-validated accuracy."""
+    strategy_comparison.gui()
 
 
 @fl.with_fiat_attributes(label = "Draw data distribution")
@@ -157,7 +166,10 @@ def enter_prime_number(n: int) -> None:
 # Part 4: create the graph and run the application
 # ------------------------------------------------
 graph = fl.FunctionsGraph()  #
-graph.add_function_composition([scatter_source, scatter_to_df, plot_boundary])  # Add a functions composition to the graph
+graph.add_function_composition([scatter_source, scatter_to_df, plot_boundary_gui])  # Add a functions composition to the graph
+graph.add_function(compare_strategies)  # Add the comparison of all the strategies...
+graph.add_link("scatter_to_df", "compare_strategies", "df")  # ...fed by the dataframe
+graph.add_gui_node(show_strategy_comparison)  # and its results panel
 graph.add_markdown_node(__doc__)  # Add a markdown node with the docstring of the application
 graph.add_gui_node(show_time_left)  # Add a GUI node to show the time left
 graph.add_function(enter_prime_number)  # Add a function node to enter a prime number
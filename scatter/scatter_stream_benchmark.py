@@ -0,0 +1,99 @@
+"""Benchmark of the live ingestion (ScatterStream) and of the scatter rendering, without display.
+
+A producer thread pushes points at a given rate (100k points/s by default), while the main thread simulates
+the GUI frames: once per frame, it drains the stream and re-renders the scatter image (as ScatterPresenter does).
+It reports the frame durations, the number of ingested / retained points and the memory usage,
+and exits with code 1 if the target is not met (ingestion rate below 95% of the requested one,
+or 99th percentile of the work per frame above the frame budget).
+
+    python scatter_stream_benchmark.py --points-per-second 100000 --duration 10
+"""
+import argparse
+import resource
+import sys
+import threading
+import time
+
+import numpy as np
+from scatter_widget_bundle import ScatterData, ScatterStream
+from scatter_widget_bundle.coordinate_transformer import CoordinateTransformer
+from scatter_widget_bundle.scatter_render import render_scatter_image
+
+
+def produce_points(stream: ScatterStream, points_per_second: int, batches_per_second: int,
+                   stop_event: threading.Event, counter: list[int]) -> None:
+    rng = np.random.default_rng(0)
+    cluster_names = ["a", "b", "c"]
+    batch_size = points_per_second // batches_per_second
+    start = time.perf_counter()
+    nb_batches = 0
+    while not stop_event.is_set():
+        cluster_name = cluster_names[nb_batches % len(cluster_names)]
+        stream.push(cluster_name, rng.standard_normal((batch_size, 2)))
+        counter[0] += batch_size
+        nb_batches += 1
+        # keep the requested rate
+        delay = start + nb_batches / batches_per_second - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # ru_maxrss is in KB on linux
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points-per-second", type=int, default=100_000)
+    parser.add_argument("--batches-per-second", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0, help="in seconds")
+    parser.add_argument("--retention", type=int, default=20_000, help="points kept per cluster")
+    parser.add_argument("--fps", type=float, default=60.0)
+    parser.add_argument("--em-size", type=float, default=14.0)
+    args = parser.parse_args()
+
+    stream = ScatterStream(retention=args.retention)
+    scatter = ScatterData()
+    stop_event = threading.Event()
+    counter = [0]
+    producer = threading.Thread(
+        target=produce_points,
+        args=(stream, args.points_per_second, args.batches_per_second, stop_event, counter),
+        daemon=True)
+
+    frame_budget = 1 / args.fps
+    frame_durations = []
+    rss_start = max_rss_mb()
+    producer.start()
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.duration:
+        frame_start = time.perf_counter()
+        if stream.drain_into(scatter):
+            transformer = CoordinateTransformer(scatter.bounding, (20, 20), args.em_size)
+            render_scatter_image(scatter, transformer, stream.streamed_points())
+        frame_duration = time.perf_counter() - frame_start
+        frame_durations.append(frame_duration)
+        time.sleep(max(0.0, frame_budget - frame_duration))
+    elapsed = time.perf_counter() - start
+    stop_event.set()
+    producer.join()
+
+    durations_ms = np.array(frame_durations) * 1000
+    nb_retained = sum(stream.nb_streamed_points(cluster.name) for cluster in scatter.classes)
+    print(f"Ingested {counter[0]:,} points in {elapsed:.1f} s ({counter[0] / elapsed:,.0f} points/s)")
+    print(f"Retained {nb_retained:,} points ({len(scatter.classes)} clusters, retention {args.retention:,})")
+    print(f"Frames: {len(durations_ms)}, work per frame (drain + render): "
+          f"median {np.median(durations_ms):.2f} ms, p99 {np.percentile(durations_ms, 99):.2f} ms, "
+          f"max {durations_ms.max():.2f} ms")
+    nb_late = int((durations_ms > frame_budget * 1000).sum())
+    print(f"Frames over the {frame_budget * 1000:.1f} ms budget: {nb_late}")
+    print(f"Max RSS: {rss_start:.0f} MB at start, {max_rss_mb():.0f} MB at the end")
+
+    ingestion_ok = counter[0] / elapsed >= 0.95 * args.points_per_second
+    frames_ok = np.percentile(durations_ms, 99) <= frame_budget * 1000
+    print("Target met" if ingestion_ok and frames_ok else "Target NOT met")
+    return 0 if ingestion_ok and frames_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,8 @@
 from .scatter_data import ScatterData
 from .scatter_presenter import ScatterPresenter
+from .scatter_stream import ScatterStream
 from .scatter_with_gui import register_widget_fiatlight_gui
 
 register_widget_fiatlight_gui()
 
-__all__ = ["ScatterData", "ScatterPresenter"]
\ No newline at end of file
+__all__ = ["ScatterData", "ScatterPresenter", "ScatterStream"]
\ No newline at end of file
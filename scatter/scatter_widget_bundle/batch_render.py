@@ -0,0 +1,240 @@
+"""Headless batch renderer for saved scatter states.
+
+Loads a directory of saved states, and for each of them renders the scatter image and the decision boundary
+image to PNG, and computes the cross-validated score of each decision strategy.
+No display is needed: the scatter image is rendered with the same code as ScatterPresenter (see scatter_render),
+and the boundary with the same code as the applications (see decision_boundary).
+
+Accepted files:
+* fiatlight user settings (*.fiat_user.json), as saved by the applications: the ScatterData is looked up
+  in the function nodes inputs. The "strategy" and "eps" are read from the node which has a DecisionStrategy
+  input (i.e. the plot_boundary node), if present
+* plain ScatterData json files (i.e. `scatter.model_dump_json()`)
+Other json files (e.g. *.node_editor.json) are ignored.
+
+When the strategy or eps are not saved in a state, the defaults of plot_boundary are used,
+so that the renders match what the applications display.
+
+Usage:
+    python -m scatter_widget_bundle.batch_render saved_states/ --output-dir renders/ --jobs 4
+"""
+import argparse
+import inspect
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+from .scatter_data import ScatterData, Point2d
+from .coordinate_transformer import CoordinateTransformer
+from .scatter_render import render_scatter_image
+
+
+DEFAULT_EM_SIZE = 14.0  # pixel size of the font used to convert em to pixels (there is no imgui context here)
+
+
+class SavedScatterState(BaseModel):
+    """The parts of a saved state which are needed for rendering."""
+    scatter: ScatterData
+    strategy_name: str | None = None  # name of a DecisionStrategy member
+    eps: float | None = None
+    image_size_em: Point2d = (20, 20)
+
+
+def _iter_nodes_inputs(user_settings: dict[str, Any]) -> list[dict[str, dict[str, Any]]]:
+    """Return the inputs of each function node in fiatlight user settings, as {input_name: input_data}."""
+    functions_nodes = user_settings.get("user_inputs", {}).get("functions_nodes", {})
+    return [
+        {input_name: input_json.get("data", {}) for input_name, input_json in node_inputs.items()}
+        for node_inputs in functions_nodes.values()
+    ]
+
+
+def _is_decision_strategy_input(data: dict[str, Any]) -> bool:
+    return data.get("type") == "Enum" and data.get("class") == "DecisionStrategy"
+
+
+def _find_image_size_em(json_content: Any) -> Point2d | None:
+    """Find the first "image_size_em" saved by a ScatterPresenter (inside the gui options)."""
+    if isinstance(json_content, dict):
+        if "image_size_em" in json_content:
+            return tuple(json_content["image_size_em"])  # type: ignore
+        children = list(json_content.values())
+    elif isinstance(json_content, list):
+        children = json_content
+    else:
+        return None
+    for child in children:
+        r = _find_image_size_em(child)
+        if r is not None:
+            return r
+    return None
+
+
+def load_saved_state(path: Path) -> SavedScatterState:
+    """Load a fiat_user.json file, or a plain ScatterData json file."""
+    with open(path) as f:
+        json_content = json.load(f)
+
+    if "classes" in json_content:
+        return SavedScatterState(scatter=ScatterData.model_validate(json_content))
+
+    scatter = None
+    strategy_name = None
+    eps = None
+    for node_inputs in _iter_nodes_inputs(json_content):
+        for data in node_inputs.values():
+            value = data.get("value")
+            if scatter is None and data.get("type") == "Pydantic" and isinstance(value, dict) and "classes" in value:
+                scatter = ScatterData.model_validate(value)
+        # strategy and eps are only read from the boundary node (the one with a DecisionStrategy input):
+        # other nodes may also have an eps input (e.g. compare_strategies)
+        is_boundary_node = any(_is_decision_strategy_input(data) for data in node_inputs.values())
+        if is_boundary_node and strategy_name is None:
+            strategy_name = next(
+                data.get("value_name") for data in node_inputs.values() if _is_decision_strategy_input(data))
+            eps_data = node_inputs.get("eps", {})
+            if eps_data.get("type") == "Primitive" and eps_data.get("value") is not None:
+                eps = float(eps_data["value"])
+    if scatter is None:
+        raise ValueError(f"No ScatterData found in {path}")
+
+    r = SavedScatterState(scatter=scatter, strategy_name=strategy_name, eps=eps)
+    image_size_em = _find_image_size_em(json_content.get("gui_options", {}))
+    if image_size_em is not None:
+        r.image_size_em = image_size_em
+    return r
+
+
+def _saved_state_stem(path: Path) -> str:
+    name = path.name
+    for suffix in (".fiat_user.json", ".json"):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return path.stem
+
+
+def render_saved_state(
+        path: Path,
+        output_dir: Path,
+        em_size: float = DEFAULT_EM_SIZE,
+        default_eps: float | None = None,
+        cv: int = 5) -> dict[str, Any]:
+    """Render one saved state to PNG files, and return a row of the scores report.
+
+    Writes <output_dir>/<stem>.scatter.png and <output_dir>/<stem>.boundary.png
+    (the latter only if there are at least two classes).
+    default_eps: used if eps is not saved in the state (by default, the default of plot_boundary)
+    """
+    # Imported here, so that the matplotlib backend is selected in each worker process
+    import matplotlib
+    matplotlib.use("Agg")
+    from PIL import Image
+    from .decision_boundary import DecisionStrategy, plot_boundary, score_strategies
+
+    state = load_saved_state(path)
+    stem = _saved_state_stem(path)
+    r: dict[str, Any] = {"file": path.name, "n_points": sum(len(c.points) for c in state.scatter.classes)}
+
+    transformer = CoordinateTransformer(state.scatter.bounding, state.image_size_em, em_size)
+    scatter_image = render_scatter_image(state.scatter, transformer)
+    scatter_png = output_dir / f"{stem}.scatter.png"
+    Image.fromarray(scatter_image).save(scatter_png)
+    r["scatter_png"] = str(scatter_png)
+
+    plot_boundary_defaults = inspect.signature(plot_boundary).parameters
+    if state.strategy_name:
+        strategy = DecisionStrategy[state.strategy_name]
+    else:
+        strategy = plot_boundary_defaults["strategy"].default
+    if state.eps is not None:
+        eps = state.eps
+    elif default_eps is not None:
+        eps = default_eps
+    else:
+        eps = plot_boundary_defaults["eps"].default
+    df = state.scatter.data_as_pandas()
+    figure = plot_boundary(df, strategy, eps, latency_target=None)  # reports always use all the points
+    if figure is not None:
+        boundary_png = output_dir / f"{stem}.boundary.png"
+        figure.savefig(boundary_png)
+        r["boundary_png"] = str(boundary_png)
+    r["strategy"] = strategy.name
+
+    for strategy_name, score in score_strategies(df, cv).items():
+        r[f"score_{strategy_name}"] = score
+    return r
+
+
+def _is_scatter_data_file(path: Path) -> bool:
+    try:
+        with open(path) as f:
+            json_data = json.load(f)
+        # All the fields of ScatterData have defaults: require "classes", so that any json object is not accepted
+        if not isinstance(json_data, dict) or "classes" not in json_data:
+            return False
+        ScatterData.model_validate(json_data)
+        return True
+    except (OSError, ValueError):  # json.JSONDecodeError and pydantic.ValidationError are ValueErrors
+        return False
+
+
+def _list_saved_states(input_dir: Path) -> list[Path]:
+    """The *.fiat_user.json files, and the json files which contain a valid ScatterData"""
+    r = []
+    for path in sorted(input_dir.iterdir()):
+        if not path.is_file():
+            continue
+        if path.name.endswith(".fiat_user.json") or (path.suffix == ".json" and _is_scatter_data_file(path)):
+            r.append(path)
+    return r
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Returns the exit code: 1 if at least one file could not be rendered"""
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Render saved scatter states to PNG, and score the decision strategies")
+    parser.add_argument("input_dir", type=Path, help="directory containing *.fiat_user.json or ScatterData json files")
+    parser.add_argument("--output-dir", type=Path, default=Path("renders"))
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--em-size", type=float, default=DEFAULT_EM_SIZE, help="font size in pixels (1 em)")
+    parser.add_argument(
+        "--eps", type=float, default=None,
+        help="boundary mesh step, if not saved in the state (default: the default of plot_boundary)")
+    parser.add_argument("--cv", type=int, default=5, help="number of cross validation folds")
+    args = parser.parse_args(argv)
+
+    paths = _list_saved_states(args.input_dir)
+    if not paths:
+        raise SystemExit(f"No saved state found in {args.input_dir}")
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [
+            executor.submit(render_saved_state, path, args.output_dir, args.em_size, args.eps, args.cv)
+            for path in paths
+        ]
+        rows = []
+        for path, future in zip(paths, futures):
+            try:
+                rows.append(future.result())
+            except Exception as e:
+                print(f"Failed to render {path}: {e}", file=sys.stderr)
+
+    report = pd.DataFrame(rows)
+    report_csv = args.output_dir / "scores.csv"
+    report.to_csv(report_csv, index=False)
+    score_columns = ["file"] + [c for c in report.columns if c.startswith("score_")]
+    if len(report):
+        print(report[score_columns].to_string(index=False, float_format="{:.3f}".format))
+    print(f"Rendered {len(rows)}/{len(paths)} files into {args.output_dir}, scores in {report_csv}")
+    return 0 if len(rows) == len(paths) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -72,6 +72,13 @@ class CoordinateTransformer:
         transformed_points = points_homogeneous @ self.transform_bounds_to_pixel.T  # Shape: (N, 2)
         return [tuple(pt) for pt in transformed_points]
 
+    def to_pixels_array(self, points: list[Point2d] | NDArray[np.float64]) -> NDArray[np.float64]:
+        """
+        Transforms points from scatter bounds to pixel coordinates, and returns them as an (N, 2) array.
+        """
+        points_array = np.asarray(points, dtype=np.float64).reshape(-1, 2)  # Shape: (N, 2)
+        return points_array @ self.transform_bounds_to_pixel[:, :2].T + self.transform_bounds_to_pixel[:, 2]
+
     def to_bounds(self, point_pixel: Point2d) -> Point2d:
         """
         Transforms a point from pixel coordinates to scatter bounds.
@@ -0,0 +1,449 @@
+"""Decision boundaries of classifiers, fitted on a scatter dataset.
+
+This is shared by the applications (scatter_fiatlight.py, scatter_bundle_app.py) and by the headless
+batch renderer (batch_render.py), so that they all produce the same plots.
+Note: this module requires scikit-learn and matplotlib.
+"""
+from enum import Enum
+from concurrent.futures import Future
+from typing import Any, Callable
+import functools
+import threading
+import time
+
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
+from sklearn.linear_model import LogisticRegression  # type: ignore
+from sklearn.inspection import DecisionBoundaryDisplay  # type: ignore
+from sklearn.neighbors import KNeighborsClassifier  # type: ignore
+from sklearn.svm import SVC  # type: ignore
+from sklearn.tree import DecisionTreeClassifier  # type: ignore
+from pydantic import BaseModel, ConfigDict
+import numpy as np
+import pandas as pd
+
+
+class DecisionStrategy(Enum):
+    """This is a simple enum to choose between logistic regression and decision tree
+    Fiatlight will automatically convert this to radio buttons in the UI
+    """
+    logistic_regression = LogisticRegression
+    decision_tree = DecisionTreeClassifier
+
+
+# A function that returns a new (unfitted) classifier, e.g. a classifier class, or a functools.partial
+StrategyFactory = Callable[[], Any]
+
+# All the strategies which are compared / scored. Additional strategies can be added with register_strategy()
+_STRATEGIES: dict[str, StrategyFactory] = {strategy.name: strategy.value for strategy in DecisionStrategy}
+
+
+def register_strategy(name: str, factory: StrategyFactory) -> None:
+    """Register an additional strategy, e.g.
+        register_strategy("random_forest", functools.partial(RandomForestClassifier, n_estimators=50))
+    """
+    _STRATEGIES[name] = factory
+
+
+def registered_strategies() -> dict[str, StrategyFactory]:
+    """The DecisionStrategy members, followed by the strategies added with register_strategy()"""
+    return dict(_STRATEGIES)
+
+
+# Additional strategies, shared by the applications and the batch renderer (comparison mode and scores)
+register_strategy("knn", KNeighborsClassifier)
+register_strategy("rbf_svc", functools.partial(SVC, kernel="rbf"))
+
+
+def _df_to_xy(df: pd.DataFrame) -> tuple[np.ndarray, pd.Series]:
+    X = df[['x', 'y']].values if len(df) else np.empty((0, 2))
+    y = df['color'] if len(df) else pd.Series([], dtype=str)
+    return X, y
+
+
+def _nb_cv_folds(y: pd.Series, cv: int) -> int:
+    """The number of folds is reduced if a class has less than cv points (0 if cross validation is not possible)"""
+    class_counts = y.value_counts()
+    n_folds = min(cv, int(class_counts.min())) if len(class_counts) > 1 else 0
+    return n_folds if n_folds >= 2 else 0
+
+
+def _new_figure() -> Figure:
+    """Create a figure without pyplot (which is not thread-safe), drawn with the Agg backend"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def _draw_boundary(
+        ax: Axes,
+        classifier: Any,
+        X: np.ndarray,
+        y: pd.Series,
+        eps: float,
+        overlay_idx: np.ndarray | None = None) -> None:
+    """Draw the decision boundary of a fitted classifier, and the points on top of it
+    (only the points at overlay_idx, if given)"""
+    is_binary = y.nunique() == 2
+    disp = DecisionBoundaryDisplay.from_estimator(
+        classifier, X,
+        response_method="predict_proba" if is_binary and hasattr(classifier, "predict_proba") else "predict",
+        xlabel="x", ylabel="y",
+        eps=eps,
+        ax=ax
+    )
+    if overlay_idx is not None:
+        X, y = X[overlay_idx], y.iloc[overlay_idx]
+    disp.ax_.scatter(X[:, 0], X[:, 1], c=y, edgecolor="k")
+
+
+def submit_in_daemon_thread(fn: Callable[..., Any], *args: Any) -> Future[Any]:
+    """Run fn(*args) in a new daemon thread, and return its future.
+    Unlike the workers of a ThreadPoolExecutor (which are joined at interpreter exit),
+    daemon threads do not keep the application alive: closing it does not wait for a long fit.
+    """
+    future: Future[Any] = Future()
+
+    def run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+# ========================================
+# Large data mode
+# ========================================
+# When a dataset is too large to be fitted within the latency target, it is reduced before fitting,
+# and the figure title tells that the boundary is an approximation.
+# The number of points that can be fitted (the budget) is derived from the fit throughput measured so far,
+# and from the time left by the drawing of the boundary (the prediction on the mesh, and the overlay of the points).
+# The overlay is capped to _MAX_OVERLAY_POINTS, whatever the budget.
+class SubsamplingMethod(Enum):
+    """How a large dataset is reduced before fitting"""
+    # class-balanced random subsample, weighted so that the classes keep their real proportions
+    stratified = "stratified"
+    # one point per (grid cell, class), at the centroid of the cell points, weighted by their number
+    grid_coreset = "grid_coreset"
+
+
+DEFAULT_LATENCY_TARGET = 0.2  # seconds
+_MIN_BUDGET = 2_000
+_INITIAL_BUDGET = 20_000  # used until a fit duration was measured for a strategy
+_MAX_OVERLAY_POINTS = 5_000  # max number of points drawn on top of the boundary
+_fit_throughputs: dict[str, float] = {}  # strategy name -> measured fit throughput (points / second)
+_draw_durations: dict[str, float] = {}  # strategy name -> measured duration of _draw_boundary (seconds)
+
+
+def large_data_budget(strategy_name: str, latency_target: float = DEFAULT_LATENCY_TARGET) -> int:
+    """The number of points which can be fitted by a strategy within the latency target
+    (minus the time needed to draw the boundary)"""
+    throughput = _fit_throughputs.get(strategy_name)
+    if throughput is None:
+        return _INITIAL_BUDGET
+    fit_seconds = latency_target - _draw_durations.get(strategy_name, 0.0)
+    return max(_MIN_BUDGET, int(throughput * fit_seconds))
+
+
+def _measure_fit_throughput(strategy_name: str, nb_points: int, fit_seconds: float) -> None:
+    if nb_points < _MIN_BUDGET or fit_seconds <= 0:
+        return  # small fits are dominated by their overhead
+    throughput = nb_points / fit_seconds
+    previous = _fit_throughputs.get(strategy_name)
+    _fit_throughputs[strategy_name] = throughput if previous is None else 0.5 * (previous + throughput)
+
+
+def _measure_draw_duration(strategy_name: str, draw_seconds: float) -> None:
+    previous = _draw_durations.get(strategy_name)
+    _draw_durations[strategy_name] = draw_seconds if previous is None else 0.5 * (previous + draw_seconds)
+
+
+def _balanced_quotas(class_counts: np.ndarray, budget: int) -> np.ndarray:
+    """Share the budget between the classes: the small classes are kept entirely,
+    and the rest of the budget is shared equally by the others"""
+    quotas = np.zeros_like(class_counts)
+    remaining = budget
+    order = np.argsort(class_counts)
+    for i, class_idx in enumerate(order):
+        share = remaining // (len(order) - i)
+        quotas[class_idx] = min(class_counts[class_idx], share)
+        remaining -= quotas[class_idx]
+    return quotas
+
+
+def _stratified_subsample(
+        X: np.ndarray, y: pd.Series, budget: int, rng: np.random.Generator
+        ) -> tuple[np.ndarray, pd.Series, np.ndarray]:
+    classes, y_idx = np.unique(y.to_numpy(), return_inverse=True)
+    class_counts = np.bincount(y_idx)
+    quotas = _balanced_quotas(class_counts, budget)
+    selected = np.concatenate([
+        rng.choice(np.flatnonzero(y_idx == class_idx), quotas[class_idx], replace=False)
+        for class_idx in range(len(classes))
+    ])
+    weights = (class_counts / np.maximum(quotas, 1))[y_idx[selected]]
+    return X[selected], y.iloc[selected], weights
+
+
+def _grid_coreset(X: np.ndarray, y: pd.Series, budget: int) -> tuple[np.ndarray, pd.Series, np.ndarray]:
+    classes, y_idx = np.unique(y.to_numpy(), return_inverse=True)
+    nb_cells = max(2, int(np.sqrt(budget / len(classes))))  # per axis
+    mins = X.min(axis=0)
+    spans = np.maximum(X.max(axis=0) - mins, np.finfo(np.float64).eps)
+    cells = np.clip(((X - mins) / spans * nb_cells).astype(np.int64), 0, nb_cells - 1)
+    keys = (cells[:, 0] * nb_cells + cells[:, 1]) * len(classes) + y_idx
+    unique_keys, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    centroids = np.column_stack([
+        np.bincount(inverse, weights=X[:, 0]) / counts,
+        np.bincount(inverse, weights=X[:, 1]) / counts,
+    ])
+    coreset_y = pd.Series(classes[unique_keys % len(classes)])
+    return centroids, coreset_y, counts.astype(np.float64)
+
+
+def reduce_dataset(
+        X: np.ndarray,
+        y: pd.Series,
+        budget: int,
+        method: SubsamplingMethod = SubsamplingMethod.grid_coreset,
+        random_state: int = 0) -> tuple[np.ndarray, pd.Series, np.ndarray]:
+    """Reduce a dataset to about `budget` points. Returns (X, y, sample_weight)"""
+    if method == SubsamplingMethod.stratified:
+        return _stratified_subsample(X, y, budget, np.random.default_rng(random_state))
+    else:
+        return _grid_coreset(X, y, budget)
+
+
+def _supports_sample_weight(classifier: Any) -> bool:
+    from sklearn.utils.validation import has_fit_parameter  # type: ignore
+    return bool(has_fit_parameter(classifier, "sample_weight"))
+
+
+def _fit_data(
+        classifier: Any, X: np.ndarray, y: pd.Series, budget: int, method: SubsamplingMethod
+        ) -> tuple[np.ndarray, pd.Series, dict[str, Any], SubsamplingMethod]:
+    """The data used to fit a classifier: the dataset itself, or its reduction if it has more than `budget` points.
+    Returns (X_fit, y_fit, fit_params, method)"""
+    if len(X) <= budget:
+        return X, y, {}, method
+    supports_sample_weight = _supports_sample_weight(classifier)
+    if not supports_sample_weight:
+        method = SubsamplingMethod.stratified  # its subsample is still usable without weights
+    X_fit, y_fit, sample_weight = reduce_dataset(X, y, budget, method)
+    fit_params = {"sample_weight": sample_weight} if supports_sample_weight else {}
+    return X_fit, y_fit, fit_params, method
+
+
+def _overlay_indices(nb_points: int) -> np.ndarray | None:
+    """The points drawn on top of the boundary (None means all of them)"""
+    if nb_points <= _MAX_OVERLAY_POINTS:
+        return None
+    return np.random.default_rng(0).choice(nb_points, _MAX_OVERLAY_POINTS, replace=False)
+
+
+def _approximation_label(nb_fit_points: int, nb_points: int, method: SubsamplingMethod) -> str:
+    return f"approximation: {nb_fit_points:,} {method.name} points for {nb_points:,}"
+
+
+def plot_boundary(
+        df: pd.DataFrame,
+        strategy: DecisionStrategy = DecisionStrategy.logistic_regression,
+        eps: float = 1.0,
+        latency_target: float | None = DEFAULT_LATENCY_TARGET,
+        method: SubsamplingMethod = SubsamplingMethod.grid_coreset) -> Figure | None:
+    """Plot the decision boundary of a classifier on a 2D dataset
+    * df is a DataFrame with columns 'x', 'y', 'color' (see ScatterData.data_as_pandas())
+    * strategy is a DecisionStrategy enum (choose between logistic regression and decision tree)
+    * eps is the step size in the meshgrid
+    * latency_target: if the dataset is too large to be fitted within this duration (in seconds),
+      it is reduced with the given method, and the title says that the boundary is approximate.
+      Use None to always fit all the points.
+      In any case, at most _MAX_OVERLAY_POINTS points are drawn on top of the boundary.
+
+    Returns None if there are less than two classes.
+    """
+    if len(df) and (df['color'].nunique() > 1):
+        X, y = _df_to_xy(df)
+        fig = _new_figure()
+        ax = fig.subplots()
+        classifier = strategy.value()
+
+        budget = large_data_budget(strategy.name, latency_target) if latency_target is not None else len(X)
+        is_approximate = len(X) > budget
+        X_fit, y_fit, fit_params, method = _fit_data(classifier, X, y, budget, method)
+
+        start = time.perf_counter()
+        classifier.fit(X_fit, y_fit, **fit_params)
+        _measure_fit_throughput(strategy.name, len(X_fit), time.perf_counter() - start)
+
+        overlay_idx = _overlay_indices(len(X))
+        start = time.perf_counter()
+        _draw_boundary(ax, classifier, X, y, eps, overlay_idx)
+        _measure_draw_duration(strategy.name, time.perf_counter() - start)
+        title = f"{classifier.__class__.__name__}"
+        if is_approximate:
+            title += f" ({_approximation_label(len(X_fit), len(X), method)})"
+        elif overlay_idx is not None:
+            title += f" ({len(overlay_idx):,} of {len(X):,} points shown)"
+        ax.set_title(title)
+        return fig
+    else:
+        return None
+
+
+class BackgroundBoundaryPlot:
+    """Keeps a boundary plot up to date with a dataset which is being drawn.
+    While the user draws, update() plots a fast approximation (see plot_boundary large data mode).
+    When the user stops drawing for `idle_seconds`, poll() runs a full fidelity fit in a background (daemon) thread,
+    and replaces the figure when it is ready.
+    """
+    idle_seconds: float
+    figure: Figure | None = None
+    is_approximate: bool = False
+    _last_update: tuple[pd.DataFrame, DecisionStrategy, float] | None = None
+    _last_update_time: float = 0.0
+    _generation: int = 0  # incremented at each update()
+    _full_fit: tuple[int, Future[Figure | None]] | None = None
+
+    def __init__(self, idle_seconds: float = 0.5):
+        self.idle_seconds = idle_seconds
+
+    def update(self, df: pd.DataFrame, strategy: DecisionStrategy, eps: float) -> Figure | None:
+        self._generation += 1
+        self.is_approximate = len(df) > large_data_budget(strategy.name)
+        self.figure = plot_boundary(df, strategy, eps)
+        self._last_update = (df, strategy, eps)
+        self._last_update_time = time.time()
+        return self.figure
+
+    def poll(self) -> bool:
+        """Start the full fidelity fit if the user stopped drawing, and return True if the figure was refined"""
+        if self._full_fit is not None:
+            generation, future = self._full_fit
+            if not future.done():
+                return False
+            self._full_fit = None
+            if generation == self._generation:
+                self.figure = future.result()
+                self.is_approximate = False
+                return True
+        is_idle = time.time() - self._last_update_time > self.idle_seconds
+        if self.is_approximate and is_idle and self._last_update is not None:
+            df, strategy, eps = self._last_update
+            future = submit_in_daemon_thread(plot_boundary, df, strategy, eps, None)
+            self._full_fit = (self._generation, future)
+        return False
+
+    def plot(self, df: pd.DataFrame, strategy: DecisionStrategy, eps: float) -> Figure | None:
+        """Call update() if the arguments changed since the last update, else return the current figure
+        (possibly refined by poll()). This suits callers which are invoked again when poll() returns True,
+        e.g. a fiatlight function node whose on_heartbeat is poll().
+        """
+        if self._last_update is not None:
+            last_df, last_strategy, last_eps = self._last_update
+            if last_df is df and last_strategy == strategy and last_eps == eps:
+                return self.figure
+        return self.update(df, strategy, eps)
+
+    def shutdown(self) -> None:
+        """Forget the pending full fidelity fit (it runs in a daemon thread, and is not waited for)"""
+        self._full_fit = None
+        self._last_update = None
+
+
+def score_strategies(df: pd.DataFrame, cv: int = 5) -> dict[str, float]:
+    """Mean cross-validated accuracy of each registered strategy on a 2D dataset (see plot_boundary for df)
+    The scores are nan if there are not enough points per class.
+    """
+    from sklearn.model_selection import cross_val_score  # type: ignore
+
+    X, y = _df_to_xy(df)
+    n_folds = _nb_cv_folds(y, cv)
+    r = {}
+    for name, factory in registered_strategies().items():
+        if n_folds == 0:
+            r[name] = float("nan")
+        else:
+            r[name] = float(cross_val_score(factory(), X, y, cv=n_folds).mean())
+    return r
+
+
+class StrategyEvaluation(BaseModel):
+    """The result of evaluate_strategy()"""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    name: str
+    figure: Figure | None = None
+    # CPU time of the evaluating thread: unlike wall-clock durations, it does not include the time spent waiting
+    # for the other evaluations running in parallel (GIL, cores), so that strategies can be compared.
+    # (native code parallelized in other threads, e.g. by BLAS, is not counted)
+    fit_cpu_seconds: float = 0.0
+    predict_cpu_seconds: float = 0.0
+    cv_accuracy: float = float("nan")
+    # Set if the dataset was too large for the latency target, and was reduced (see plot_boundary)
+    approximation: str | None = None
+    error: str | None = None
+
+
+def evaluate_strategy(
+        name: str,
+        factory: StrategyFactory,
+        df: pd.DataFrame,
+        eps: float = 1.0,
+        cv: int = 5,
+        latency_target: float | None = DEFAULT_LATENCY_TARGET,
+        method: SubsamplingMethod = SubsamplingMethod.grid_coreset) -> StrategyEvaluation:
+    """Fit a strategy, measure the CPU time of its fit and predict, compute its cross-validated accuracy, and plot its boundary.
+
+    Large datasets are handled as in plot_boundary: the fit uses a reduction of the dataset if it is too large
+    for the latency target (see r.approximation), the cross validation uses a random subsample of the same size,
+    and at most _MAX_OVERLAY_POINTS points are drawn.
+
+    This can be called from worker threads: the figure is created without pyplot (which is not thread-safe),
+    and drawn with the Agg backend.
+    """
+    from sklearn.model_selection import cross_val_score  # type: ignore
+
+    r = StrategyEvaluation(name=name)
+    X, y = _df_to_xy(df)
+    if y.nunique() < 2:
+        r.error = "needs at least two classes"
+        return r
+    try:
+        classifier = factory()
+        budget = large_data_budget(name, latency_target) if latency_target is not None else len(X)
+        X_fit, y_fit, fit_params, method = _fit_data(classifier, X, y, budget, method)
+        if len(X_fit) < len(X):
+            r.approximation = _approximation_label(len(X_fit), len(X), method)
+
+        start = time.thread_time()
+        classifier.fit(X_fit, y_fit, **fit_params)
+        r.fit_cpu_seconds = time.thread_time() - start
+        _measure_fit_throughput(name, len(X_fit), r.fit_cpu_seconds)
+
+        start = time.thread_time()
+        classifier.predict(X_fit)
+        r.predict_cpu_seconds = time.thread_time() - start
+
+        X_cv, y_cv = X, y
+        if len(X_fit) < len(X):
+            cv_idx = np.random.default_rng(0).choice(len(X), len(X_fit), replace=False)
+            X_cv, y_cv = X[cv_idx], y.iloc[cv_idx]
+        n_folds = _nb_cv_folds(y_cv, cv)
+        if n_folds > 0:
+            r.cv_accuracy = float(cross_val_score(factory(), X_cv, y_cv, cv=n_folds).mean())
+
+        figure = _new_figure()
+        ax = figure.subplots()
+        _draw_boundary(ax, classifier, X, y, eps, _overlay_indices(len(X)))
+        ax.set_title(name if r.approximation is None else f"{name} ({r.approximation})")
+        r.figure = figure
+    except Exception as e:
+        r.error = str(e)
+    return r
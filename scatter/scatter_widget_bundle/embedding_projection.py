@@ -0,0 +1,175 @@
+"""Projection of high dimensional embeddings (e.g. CLIP image embeddings) into a 2D scatter.
+
+Embeddings are streamed by batches:
+* during a warm-up phase, the raw embeddings are kept, until `max_fit_samples` embeddings were received
+  (or until freeze() is called). The projection is then fitted on them, and frozen: all the warm-up embeddings are
+  projected once, and their 2D points are pushed into a ScatterStream (one cluster per label),
+  which stores them in numpy ring buffers.
+* after the warm-up, each new batch is projected with the frozen projection, and pushed into the stream.
+  Adding new embeddings never triggers a recompute of the points which were already projected,
+  and all the points are projected with the same projection.
+
+The integer id of each embedding (e.g. its index in a list of image paths) is kept with its point in the ring
+buffers: projected_points() returns the retained points with their ids, and relabel() moves points to another
+label (i.e. another cluster of the scatter) by id.
+The memory stays bounded: the warm-up embeddings are only kept until the projection is frozen,
+and the projected points are only kept in the ring buffers of the stream (`retention` points per label).
+
+Usage, in a notebook:
+    projector = EmbeddingProjector()
+    for X_batch, labels_batch in batches:
+        projector.add_batch(X_batch, labels_batch)
+    projector.freeze()  # if less than max_fit_samples embeddings were added
+    scatter_presenter = ScatterPresenter(ScatterData())
+    scatter_presenter.attach_stream(projector.stream)
+    ...
+    projector.relabel([12, 42], "other label")  # displayed at the next frame
+or, in a GUI: attach the stream in the same way, and call add_batch() and relabel() from a producer thread.
+
+Note: this module requires scikit-learn.
+"""
+from enum import Enum
+from typing import Any, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+from .scatter_stream import IdsArray, ScatterStream
+
+
+class ProjectionMethod(Enum):
+    # IncrementalPCA, fitted on the first `max_fit_samples` embeddings, then frozen
+    incremental_pca = "incremental_pca"
+    # SparseRandomProjection: fitted on the first batch (it only depends on the number of features)
+    sparse_random_projection = "sparse_random_projection"
+
+
+class EmbeddingProjector:
+    """Projects batches of embeddings (n_samples, n_features) into 2D, and streams them into ScatterData clusters"""
+    method: ProjectionMethod
+    max_fit_samples: int
+    stream: ScatterStream
+    _projection: Any = None  # the sklearn transformer
+    _is_frozen: bool = False
+    _nb_received: int = 0  # number of embeddings received so far (used for the default ids)
+    # Warm-up batches: (embeddings, labels, ids), kept until the projection is frozen
+    _warmup_batches: list[tuple[NDArray[np.float64], NDArray[Any], IdsArray]]
+
+    def __init__(
+            self,
+            method: ProjectionMethod = ProjectionMethod.incremental_pca,
+            max_fit_samples: int = 5_000,
+            retention: int = 50_000,
+            random_state: int = 0):
+        from sklearn.decomposition import IncrementalPCA  # type: ignore
+        from sklearn.random_projection import SparseRandomProjection  # type: ignore
+
+        self.method = method
+        self.max_fit_samples = max_fit_samples
+        self.stream = ScatterStream(retention=retention)
+        if method == ProjectionMethod.incremental_pca:
+            self._projection = IncrementalPCA(n_components=2)
+        else:
+            self._projection = SparseRandomProjection(n_components=2, random_state=random_state)
+        self._is_frozen = False
+        self._nb_received = 0
+        self._warmup_batches = []
+
+    def is_frozen(self) -> bool:
+        """True when the projection is fitted, and no longer updated by new batches"""
+        return self._is_frozen
+
+    def nb_warmup_samples(self) -> int:
+        return sum(len(embeddings) for embeddings, _, _ in self._warmup_batches)
+
+    def freeze(self) -> None:
+        """Fit the projection on the warm-up embeddings, then project and push them.
+        Called automatically once max_fit_samples embeddings were received.
+        """
+        if self._is_frozen:
+            return
+        if not self._warmup_batches:
+            raise ValueError("EmbeddingProjector.freeze(): no embeddings were added")
+        embeddings = np.concatenate([batch[0] for batch in self._warmup_batches])
+        labels = np.concatenate([batch[1] for batch in self._warmup_batches])
+        ids = np.concatenate([batch[2] for batch in self._warmup_batches])
+        if self.method == ProjectionMethod.incremental_pca and len(embeddings) < 2:
+            raise ValueError("EmbeddingProjector.freeze(): IncrementalPCA needs at least 2 embeddings")
+        self._projection.fit(embeddings)
+        self._is_frozen = True
+        self._warmup_batches = []
+        self._push(embeddings, labels, ids)
+
+    def transform(self, embeddings: NDArray[np.float64]) -> NDArray[np.float64]:
+        """Project embeddings into 2D (the projection must be frozen)"""
+        return np.asarray(self._projection.transform(embeddings), dtype=np.float64)
+
+    def _push(self, embeddings: NDArray[np.float64], labels: NDArray[Any], ids: IdsArray) -> None:
+        points = self.transform(embeddings)
+        for label in np.unique(labels):
+            is_label = labels == label
+            self.stream.push(str(label), points[is_label], ids[is_label])
+
+    def add_batch(
+            self,
+            embeddings: NDArray[np.float64],
+            labels: Sequence[str],
+            ids: Sequence[int] | None = None) -> None:
+        """Add a batch of embeddings, with their labels (one cluster per label).
+        ids: an integer id for each embedding (by default, its index among all the embeddings added so far).
+
+        During the warm-up, the batch is only stored. Once the projection is frozen, it is projected
+        and pushed into the stream.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float64)
+        labels_array = np.asarray(labels)
+        if len(embeddings) != len(labels_array):
+            raise ValueError(f"Got {len(embeddings)} embeddings, but {len(labels_array)} labels")
+        if ids is None:
+            ids_array = np.arange(self._nb_received, self._nb_received + len(embeddings))
+        else:
+            ids_array = np.asarray(ids)
+            if len(ids_array) != len(embeddings):
+                raise ValueError(f"Got {len(embeddings)} embeddings, but {len(ids_array)} ids")
+            if not np.issubdtype(ids_array.dtype, np.integer):
+                raise ValueError(f"The ids must be integers, got {ids_array.dtype}")
+            ids_array = ids_array.astype(np.int64)
+        self._nb_received += len(embeddings)
+
+        if self._is_frozen:
+            self._push(embeddings, labels_array, ids_array)
+            return
+        self._warmup_batches.append((embeddings, labels_array, ids_array))
+        warmup_done = (
+            self.method == ProjectionMethod.sparse_random_projection
+            or self.nb_warmup_samples() >= self.max_fit_samples
+        )
+        if warmup_done:
+            self.freeze()
+
+    def relabel(self, ids: Sequence[int], label: str) -> None:
+        """Move the projected points with the given ids to another label (a new one, or an existing one).
+        The points are not projected again: they are moved between the ring buffers of the stream.
+        """
+        self.stream.relabel(ids, str(label))
+
+    def projected_points(self) -> pd.DataFrame:
+        """The projected points retained by the stream (at most `retention` per label: the oldest ones are dropped),
+        with their current label, with columns "id", "label", "x", "y".
+
+        This reads the ring buffers of the stream: call it from the thread which displays the stream,
+        or when no GUI is running.
+        """
+        self.stream.flush()
+        points_by_label = self.stream.streamed_points()
+        if not points_by_label:
+            return pd.DataFrame(columns=["id", "label", "x", "y"])
+        ids_by_label = self.stream.streamed_ids()
+        points = np.concatenate(list(points_by_label.values()))
+        return pd.DataFrame({
+            "id": np.concatenate([ids_by_label[label] for label in points_by_label]),
+            "label": np.repeat(list(points_by_label.keys()), [len(p) for p in points_by_label.values()]),
+            "x": points[:, 0],
+            "y": points[:, 1],
+        })
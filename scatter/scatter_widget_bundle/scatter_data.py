@@ -4,7 +4,10 @@ cf https://www.youtube.com/watch?v=STPv0jSAQEk&list=PLSIzlWDI17bS025ph6R0W_3RKM0
 "Drawing a Dataset from inside Jupyter"
 And the scatter ipywidget here: https://github.com/koaning/drawdata, by @koaning (vincent d warmerdam)
 """
+import colorsys
+
 from pydantic import BaseModel
+import numpy as np
 import pandas as pd
 
 Point2d = tuple[float, float]
@@ -17,6 +20,33 @@ def color_to_hex_string(color: Color) -> str:
     return f"#{color[0]:02x}{color[1]:02x}{color[2]:02x}"
 
 
+# Colors used for clusters that are created on the fly (e.g. by a ScatterStream)
+DEFAULT_PALETTE: list[Color] = [
+    (173, 216, 230),  # light blue
+    (255, 165, 0),  # light orange
+    (144, 238, 144),  # light green
+    (255, 192, 203),  # light red
+    (186, 85, 211),  # orchid
+    (240, 230, 140),  # khaki
+    (64, 224, 208),  # turquoise
+    (205, 133, 63),  # peru
+]
+
+
+def palette_color(index: int) -> Color:
+    """The color of the index-th cluster created on the fly: DEFAULT_PALETTE first, then generated colors
+    (hues spaced by the golden ratio, with alternating saturation and value), so that colors are not reused
+    when there are many clusters (e.g. one per breed in an image dataset)."""
+    if index < len(DEFAULT_PALETTE):
+        return DEFAULT_PALETTE[index]
+    generated_index = index - len(DEFAULT_PALETTE)
+    hue = (0.1 + generated_index * 0.618033988749895) % 1.0
+    saturation = (0.45, 0.75, 0.6)[generated_index % 3]
+    value = (0.95, 0.8, 0.65)[(generated_index // 3) % 3]
+    r, g, b = colorsys.hsv_to_rgb(hue, saturation, value)
+    return int(r * 255), int(g * 255), int(b * 255)
+
+
 class ScatterCluster(BaseModel):
     """A cluster of points in a scatter plot. It has a name, a color, and a list of points."""
     name: str
@@ -39,13 +69,44 @@ class ScatterData(BaseModel):
         r = f"[{classes_info}], bounding box: {self.bounding}"
         return r
 
+    def get_or_add_cluster(self, name: str) -> ScatterCluster:
+        """Return the cluster with the given name, creating it (with a palette color) if needed."""
+        for cluster in self.classes:
+            if cluster.name == name:
+                return cluster
+        color = palette_color(len(self.classes))
+        cluster = ScatterCluster(name=name, color=color)
+        self.classes.append(cluster)
+        return cluster
+
+    def expand_bounding(self, bounding: Bounding) -> bool:
+        """Grow the bounding box so that it also contains the given one. Returns True if it changed.
+        (the bounding box never shrinks)
+        """
+        (x_min, y_min), (x_max, y_max) = self.bounding
+        new_bounding = (
+            (min(x_min, bounding[0][0]), min(y_min, bounding[0][1])),
+            (max(x_max, bounding[1][0]), max(y_max, bounding[1][1])),
+        )
+        if new_bounding == self.bounding:
+            return False
+        self.bounding = new_bounding
+        return True
+
     def data_as_pandas(self) -> pd.DataFrame:
         """Return the scatter data as a pandas DataFrame."""
-        data = []
-        for cluster in self.classes:
-            for point in cluster.points:
-                data.append({"x": point[0], "y": point[1], "class": cluster.name, "color": color_to_hex_string(cluster.color)})
-        return pd.DataFrame(data)
+        # built column by column, since the scatter may contain a large number of points
+        clusters = [cluster for cluster in self.classes if len(cluster.points) > 0]
+        if len(clusters) == 0:
+            return pd.DataFrame([])
+        points = np.concatenate([np.asarray(cluster.points, dtype=np.float64).reshape(-1, 2) for cluster in clusters])
+        nb_points = [len(cluster.points) for cluster in clusters]
+        return pd.DataFrame({
+            "x": points[:, 0],
+            "y": points[:, 1],
+            "class": np.repeat([cluster.name for cluster in clusters], nb_points),
+            "color": np.repeat([color_to_hex_string(cluster.color) for cluster in clusters], nb_points),
+        })
 
     @staticmethod
     def make_default() -> "ScatterData":
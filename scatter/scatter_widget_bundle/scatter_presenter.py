@@ -4,6 +4,8 @@ from fiatlight.fiat_types import JsonDict
 from pydantic import BaseModel
 from .scatter_data import ScatterData, ScatterCluster, Point2d, Color
 from .coordinate_transformer import CoordinateTransformer
+from .scatter_stream import ScatterStream
+from .scatter_render import render_scatter_image
 
 
 class ScatterGuiOptions(BaseModel):
@@ -42,6 +44,8 @@ class ScatterPresenter:
     _cache_valid: bool = False
     _plot_image: ImageRgb  # a cache of the scatter plot as an image
     _transformer: CoordinateTransformer  # Coordinate transformer instance
+    # Live ingestion
+    _stream: ScatterStream | None = None
     # undo/redo
     _undo_stack: list[ScatterData] = []
     _redo_stack: list[ScatterData] = []
@@ -55,6 +59,25 @@ class ScatterPresenter:
     def invalidate_cache(self) -> None:
         self._cache_valid = False
 
+    def attach_stream(self, stream: ScatterStream | None) -> None:
+        """Attach a live stream: its pending batches will be ingested once per frame (see ScatterStream).
+        The streamed points are displayed, but are not part of self.scatter: use stream.merged_scatter(self.scatter)
+        to get all the points. Renaming, clearing or deleting a class also applies to its streamed points.
+        """
+        self._stream = stream
+
+    def _nb_points(self, cluster: ScatterCluster) -> int:
+        nb_streamed = self._stream.nb_streamed_points(cluster.name) if self._stream is not None else 0
+        return len(cluster.points) + nb_streamed
+
+    def _poll_stream(self) -> bool:
+        if self._stream is None or self.scatter is None:
+            return False
+        changed = self._stream.drain_into(self.scatter)
+        if changed:
+            self.invalidate_cache()
+        return changed
+
     def _store_undo(self) -> None:
         import copy
         self._undo_stack.append(copy.deepcopy(self.scatter))
@@ -99,34 +122,8 @@ class ScatterPresenter:
 
     def _compute_plot_image(self) -> None:
         """Convert the scatter plot to an image."""
-        from PIL import Image, ImageDraw
-        import numpy as np
-
-        em_pixel_size = imgui.get_font_size()
-        width_px = int(self.gui_options.image_size_em[0] * em_pixel_size)
-        height_px = int(self.gui_options.image_size_em[1] * em_pixel_size)
-        # Create a blank white image
-        image = Image.new("RGB", (width_px, height_px), color=(255, 255, 255))
-        draw = ImageDraw.Draw(image)
-
-        # Draw the dots
-        dot_size_em = 0.35
-        dot_size_px = em_pixel_size * dot_size_em
-
-        for cluster in self.scatter.classes:
-            color = cluster.color  # Assuming ColorRgb is a tuple of ints
-            cluster_points_pixel = self._transformer.to_pixels(cluster.points)
-            for point_pixel in cluster_points_pixel:
-                x, y = point_pixel
-
-                # Define the bounding box for the brush
-                upper_left = (x - dot_size_px / 2, y - dot_size_px / 2)
-                lower_right = (x + dot_size_px / 2, y + dot_size_px / 2)
-
-                # Draw the point as a filled ellipse (circle)
-                draw.ellipse([upper_left, lower_right], fill=color, outline=None)
-
-        self._plot_image = np.array(image)  # type: ignore
+        streamed_points = self._stream.streamed_points() if self._stream is not None else None
+        self._plot_image = render_scatter_image(self.scatter, self._transformer, streamed_points)  # type: ignore
 
     def _add_random_point_around(self, point_pixel: Point2d) -> None:
         """Add a point to the scatter plot, given in pixel coordinates."""
@@ -194,7 +191,11 @@ class ScatterPresenter:
             imgui.push_id(str(i))  # Ensure unique ids within the loop (labels are ids for imgui)
 
             imgui.set_next_item_width(100)
-            _, scatter_class.name = imgui.input_text("Name", scatter_class.name)
+            old_name = scatter_class.name
+            changed_name, scatter_class.name = imgui.input_text("Name", scatter_class.name)
+            if changed_name and self._stream is not None:
+                # the streamed points of the class follow it (they are stored by cluster name)
+                self._stream.rename_cluster(old_name, scatter_class.name)
             imgui.same_line()
 
             changed_color, scatter_class.color = color_edit("Color", scatter_class.color)
@@ -204,10 +205,14 @@ class ScatterPresenter:
 
             if imgui.small_button("Clear"):
                 scatter_class.points = []
+                if self._stream is not None:
+                    self._stream.clear_cluster(scatter_class.name)
                 changed = True
             imgui.same_line()
 
             if imgui.small_button("Delete"):
+                if self._stream is not None:
+                    self._stream.clear_cluster(scatter_class.name)
                 del self.scatter.classes[i]
                 self.gui_options.selected_class_idx = max(0, self.gui_options.selected_class_idx - 1)
                 changed = True
@@ -230,7 +235,7 @@ class ScatterPresenter:
                 if imgui.radio_button(scatter_class.name, is_selected):
                     self.gui_options.selected_class_idx = i
                 imgui.same_line()
-                imgui.text(f"({len(scatter_class.points)})")
+                imgui.text(f"({self._nb_points(scatter_class)})")
             imgui.same_line()
         imgui.new_line()
 
@@ -336,6 +341,7 @@ class ScatterPresenter:
         return changed
 
     def gui(self) -> bool:
+        changed_by_stream = self._poll_stream()
         needs_texture_refresh = not self._cache_valid
         self._update_cache()
         if self.scatter is None:
@@ -345,7 +351,7 @@ class ScatterPresenter:
         changed = False
         self._gui_options()
         changed = self._gui_plot(needs_texture_refresh)
-        return changed
+        return changed or changed_by_stream
 
     def save_gui_options_to_json(self) -> JsonDict:
         return self.gui_options.model_dump(mode="json")
@@ -0,0 +1,52 @@
+"""Rendering of a ScatterData into an RGB image.
+This module does not depend on imgui: it is used by ScatterPresenter, and also for headless rendering (see batch_render).
+"""
+import numpy as np
+from numpy.typing import NDArray
+from .scatter_data import ScatterData
+from .coordinate_transformer import CoordinateTransformer
+
+
+ImageRgbArray = NDArray[np.uint8]  # RGB image (height, width, 3)
+
+DOT_SIZE_EM = 0.35
+
+
+def render_scatter_image(
+        scatter: ScatterData,
+        transformer: CoordinateTransformer,
+        streamed_points: dict[str, NDArray[np.float64]] | None = None) -> ImageRgbArray:
+    """Convert the scatter plot to an image, whose size is given by the transformer.
+    streamed_points: additional (N, 2) arrays of points per cluster name (see ScatterStream.streamed_points())
+    """
+    em_pixel_size = transformer.em_size
+    width_px = int(transformer.image_size_em[0] * em_pixel_size)
+    height_px = int(transformer.image_size_em[1] * em_pixel_size)
+    # Create a blank white image
+    image = np.full((height_px, width_px, 3), 255, dtype=np.uint8)
+
+    # The dots are drawn as filled disks: we stamp all the points of a cluster at once,
+    # one pixel offset of the disk at a time (this is fast, even with a large number of points)
+    dot_radius_px = em_pixel_size * DOT_SIZE_EM / 2
+    r = int(np.ceil(dot_radius_px))
+    dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+    inside_disk = dx ** 2 + dy ** 2 <= dot_radius_px ** 2
+    disk_offsets = list(zip(dx[inside_disk], dy[inside_disk]))
+
+    for cluster in scatter.classes:
+        points_arrays = []
+        if len(cluster.points) > 0:
+            points_arrays.append(np.asarray(cluster.points, dtype=np.float64).reshape(-1, 2))
+        if streamed_points is not None and cluster.name in streamed_points:
+            points_arrays.append(streamed_points[cluster.name])
+        if len(points_arrays) == 0:
+            continue
+        points = np.concatenate(points_arrays) if len(points_arrays) > 1 else points_arrays[0]
+        centers = np.rint(transformer.to_pixels_array(points)).astype(np.int64)
+        for offset_x, offset_y in disk_offsets:
+            xs = centers[:, 0] + offset_x
+            ys = centers[:, 1] + offset_y
+            visible = (xs >= 0) & (xs < width_px) & (ys >= 0) & (ys < height_px)
+            image[ys[visible], xs[visible]] = cluster.color
+
+    return image
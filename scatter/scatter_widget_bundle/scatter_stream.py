@@ -0,0 +1,376 @@
+"""Live ingestion of point batches into a ScatterData, from a background producer.
+
+A producer (a thread, a queue consumer, a pipe or a local socket reader) calls `ScatterStream.push()`,
+possibly at a high rate. The GUI thread calls `ScatterStream.drain_into()` once per frame: all the batches
+received since the previous frame are coalesced, so that the scatter image is re-rendered at most once per frame.
+
+Points are kept in per-cluster ring buffers with a fixed retention window, so that the memory
+stays bounded whatever the ingestion rate. The streamed points stay in these numpy buffers: they are rendered
+from there, and are never copied into ScatterCluster.points, which only holds the points edited by the user
+(so that drawing, Clear, Delete and undo/redo are not overwritten by the stream).
+
+Each streamed point may have an integer id (e.g. the index of an image), which is kept with it in the ring buffers:
+relabel() moves points to another cluster by id. rename_cluster() is called by ScatterPresenter when the user
+renames a class, so that its streamed points (and the batches pushed later under the old name) follow it.
+"""
+import json
+import logging
+import queue
+import threading
+from typing import IO, Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .scatter_data import ScatterData, Bounding
+
+
+logger = logging.getLogger(__name__)
+
+PointsArray = NDArray[np.float64]  # Array of points (N, 2)
+IdsArray = NDArray[np.int64]  # Array of point ids (N,)
+
+NO_ID = -1  # id of the points pushed without ids
+
+
+def _as_points_array(points: PointsArray | list) -> PointsArray:
+    """Convert to a (N, 2) array. Raises ValueError if points is not an array of 2D points."""
+    r = np.asarray(points, dtype=np.float64)
+    if r.size == 0:
+        return np.empty((0, 2), dtype=np.float64)
+    if r.shape == (2,):
+        r = r.reshape(1, 2)
+    if r.ndim != 2 or r.shape[1] != 2:
+        raise ValueError(f"Expected an array of 2D points, got shape {r.shape}")
+    return r
+
+
+def _as_ids_array(ids: IdsArray | Sequence[int] | None, nb_points: int) -> IdsArray:
+    """Convert to a (N,) array of int64 (NO_ID if ids is None). Raises ValueError if ids are not integers."""
+    if ids is None:
+        return np.full(nb_points, NO_ID, dtype=np.int64)
+    r = np.asarray(ids)
+    if r.size == 0:
+        r = r.astype(np.int64)
+    if r.ndim != 1 or not np.issubdtype(r.dtype, np.integer):
+        raise ValueError(f"Expected a 1D array of integer ids, got {r.dtype} with shape {r.shape}")
+    if len(r) != nb_points:
+        raise ValueError(f"Got {nb_points} points, but {len(r)} ids")
+    return r.astype(np.int64)
+
+
+class ClusterRingBuffer:
+    """A fixed capacity FIFO of 2D points (and of their ids), backed by numpy arrays.
+    When full, the oldest points are overwritten.
+    """
+    _buffer: PointsArray
+    _ids: IdsArray
+    _start: int = 0  # index of the oldest point
+    _size: int = 0
+
+    def __init__(self, capacity: int):
+        self._buffer = np.empty((capacity, 2), dtype=np.float64)
+        self._ids = np.full(capacity, NO_ID, dtype=np.int64)
+        self._start = 0
+        self._size = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._buffer.shape[0]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def extend(self, points: PointsArray, ids: IdsArray | None = None) -> None:
+        """Append points, dropping the oldest ones if the capacity is exceeded."""
+        if ids is None:
+            ids = np.full(len(points), NO_ID, dtype=np.int64)
+        capacity = self.capacity
+        if len(points) >= capacity:
+            self._buffer[:] = points[-capacity:]
+            self._ids[:] = ids[-capacity:]
+            self._start = 0
+            self._size = capacity
+            return
+        end = (self._start + self._size) % capacity
+        first_part = min(len(points), capacity - end)
+        self._buffer[end:end + first_part] = points[:first_part]
+        self._buffer[:len(points) - first_part] = points[first_part:]
+        self._ids[end:end + first_part] = ids[:first_part]
+        self._ids[:len(points) - first_part] = ids[first_part:]
+        overflow = max(0, self._size + len(points) - capacity)
+        self._start = (self._start + overflow) % capacity
+        self._size = min(capacity, self._size + len(points))
+
+    def _ordered(self, array: np.ndarray) -> np.ndarray:
+        end = self._start + self._size
+        if end <= self.capacity:
+            return array[self._start:end].copy()
+        return np.concatenate([array[self._start:], array[:end - self.capacity]])
+
+    def to_array(self) -> PointsArray:
+        """Return the points, from the oldest to the newest."""
+        return self._ordered(self._buffer)
+
+    def ids(self) -> IdsArray:
+        """Return the ids of the points, in the same order as to_array()."""
+        return self._ordered(self._ids)
+
+    def remove_ids(self, ids: IdsArray) -> tuple[PointsArray, IdsArray]:
+        """Remove the points with the given ids, and return them (points, ids)."""
+        points, point_ids = self.to_array(), self.ids()
+        selected = np.isin(point_ids, ids) & (point_ids != NO_ID)
+        if not selected.any():
+            return np.empty((0, 2), dtype=np.float64), np.empty(0, dtype=np.int64)
+        self._start = 0
+        self._size = 0
+        self.extend(points[~selected], point_ids[~selected])
+        return points[selected], point_ids[selected]
+
+
+class ScatterStream:
+    """Thread-safe ingestion of point batches into per-cluster ring buffers.
+
+    * push() and relabel() can be called from any thread
+    * drain_into() should be called from the GUI thread (ScatterPresenter does it once per frame),
+      as well as the methods which read or modify the ring buffers (streamed_points(), rename_cluster(), ...)
+    """
+    retention: int  # max number of points kept per cluster
+    _lock: threading.Lock
+    _pending: dict[str, list[tuple[PointsArray, IdsArray]]]  # batches received since the last drain
+    _pending_counts: dict[str, int]
+    _relabel_requests: list[tuple[IdsArray, str]]  # received since the last drain
+    # Only accessed by the GUI thread:
+    _buffers: dict[str, ClusterRingBuffer]
+    _aliases: dict[str, str]  # renamed cluster name -> current name
+    _new_clusters: list[str]  # clusters which received points, not yet reported by drain_into()
+    _new_bounds: tuple[NDArray[np.float64], NDArray[np.float64]] | None  # (min, max) not yet reported
+    _stop_event: threading.Event
+    _threads: list[threading.Thread]
+
+    def __init__(self, retention: int = 50_000):
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._pending_counts = {}
+        self._relabel_requests = []
+        self._buffers = {}
+        self._aliases = {}
+        self._new_clusters = []
+        self._new_bounds = None
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    # ========================================
+    # Producer side
+    # ========================================
+    def push(self, cluster_name: str, points: PointsArray | list, ids: IdsArray | Sequence[int] | None = None) -> None:
+        """Add a batch of points (shape (N, 2)) to a cluster, with optional integer ids. Thread-safe.
+        The points with non-finite coordinates are dropped.
+        Raises ValueError if cluster_name is not a str, or if points is not an array of 2D points
+        (so that invalid batches are rejected by the producer, and never reach the GUI thread).
+        """
+        if not isinstance(cluster_name, str):
+            raise ValueError(f"The cluster name must be a str, got {cluster_name!r}")
+        points = _as_points_array(points)
+        ids_array = _as_ids_array(ids, len(points))
+        is_finite = np.isfinite(points).all(axis=1)
+        points, ids_array = points[is_finite], ids_array[is_finite]
+        if len(points) == 0:
+            return
+        with self._lock:
+            batches = self._pending.setdefault(cluster_name, [])
+            batches.append((points, ids_array))
+            count = self._pending_counts.get(cluster_name, 0) + len(points)
+            # If the GUI thread lags behind, only the last `retention` points would survive anyway:
+            # trim them now so that the pending memory stays bounded.
+            if count > 2 * self.retention:
+                merged_points = np.concatenate([batch[0] for batch in batches])[-self.retention:]
+                merged_ids = np.concatenate([batch[1] for batch in batches])[-self.retention:]
+                self._pending[cluster_name] = [(merged_points, merged_ids)]
+                count = len(merged_points)
+            self._pending_counts[cluster_name] = count
+
+    def relabel(self, ids: IdsArray | Sequence[int], cluster_name: str) -> None:
+        """Move the streamed points with the given ids to another cluster. Thread-safe.
+        This is applied by the next drain_into() (after the batches pushed before this call).
+        The ids which are not (or no longer) in the ring buffers are ignored.
+        """
+        if not isinstance(cluster_name, str):
+            raise ValueError(f"The cluster name must be a str, got {cluster_name!r}")
+        ids_array = np.asarray(ids)
+        ids_array = _as_ids_array(ids_array, len(ids_array))
+        with self._lock:
+            self._relabel_requests.append((ids_array, cluster_name))
+
+    def feed_from_queue(self, source: "queue.Queue[tuple[str, PointsArray]]") -> threading.Thread:
+        """Start a background thread that pushes the (cluster_name, points) batches read from a queue."""
+        def run() -> None:
+            while not self._stop_event.is_set():
+                try:
+                    cluster_name, points = source.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                try:
+                    self.push(cluster_name, points)
+                except (TypeError, ValueError) as e:
+                    logger.warning("ScatterStream: skipping invalid batch (%s)", e)
+        return self._start_thread(run)
+
+    def feed_from_lines(self, source: IO[str]) -> threading.Thread:
+        """Start a background thread that reads batches from a text stream (a pipe, or `socket.makefile("r")`).
+        Each line is a json object: {"cluster": "name", "points": [[x, y], ...]}, with an optional "ids": [...]
+        """
+        def run() -> None:
+            for line in source:
+                if self._stop_event.is_set():
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    batch = json.loads(line)
+                    self.push(batch["cluster"], batch["points"], batch.get("ids"))
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError, AttributeError) as e:
+                    # A malformed line should not stop the ingestion
+                    logger.warning("ScatterStream: skipping invalid line (%s): %.100s", e, line)
+        return self._start_thread(run)
+
+    def _start_thread(self, target) -> threading.Thread:  # type: ignore
+        thread = threading.Thread(target=target, daemon=True)
+        self._threads.append(thread)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        """Ask the feeding threads to stop."""
+        self._stop_event.set()
+
+    # ========================================
+    # GUI side
+    # ========================================
+    def _buffer(self, cluster_name: str) -> ClusterRingBuffer:
+        ring_buffer = self._buffers.get(cluster_name)
+        if ring_buffer is None:
+            ring_buffer = ClusterRingBuffer(self.retention)
+            self._buffers[cluster_name] = ring_buffer
+        return ring_buffer
+
+    def _add_to_buffer(self, cluster_name: str, points: PointsArray, ids: IdsArray) -> None:
+        self._buffer(cluster_name).extend(points, ids)
+        if cluster_name not in self._new_clusters:
+            self._new_clusters.append(cluster_name)
+        bounds_min, bounds_max = points.min(axis=0), points.max(axis=0)
+        if self._new_bounds is not None:
+            bounds_min = np.minimum(bounds_min, self._new_bounds[0])
+            bounds_max = np.maximum(bounds_max, self._new_bounds[1])
+        self._new_bounds = (bounds_min, bounds_max)
+
+    def flush(self) -> bool:
+        """Move the pending batches into the ring buffers, and apply the relabel requests.
+        Returns True if something changed. drain_into() calls it; call it directly to read the streamed points
+        when no GUI drains the stream (the clusters and bounds are then reported by the next drain_into()).
+        """
+        with self._lock:
+            pending = self._pending
+            relabel_requests = self._relabel_requests
+            self._pending = {}
+            self._pending_counts = {}
+            self._relabel_requests = []
+        if not pending and not relabel_requests:
+            return False
+
+        for cluster_name, batches in pending.items():
+            cluster_name = self._aliases.get(cluster_name, cluster_name)
+            if len(batches) == 1:
+                points, ids = batches[0]
+            else:
+                points = np.concatenate([batch[0] for batch in batches])
+                ids = np.concatenate([batch[1] for batch in batches])
+            self._add_to_buffer(cluster_name, points, ids)
+
+        for ids, cluster_name in relabel_requests:
+            cluster_name = self._aliases.get(cluster_name, cluster_name)
+            moved = [
+                ring_buffer.remove_ids(ids)
+                for name, ring_buffer in self._buffers.items() if name != cluster_name
+            ]
+            moved = [(points, point_ids) for points, point_ids in moved if len(points) > 0]
+            if moved:
+                points = np.concatenate([points for points, _ in moved])
+                point_ids = np.concatenate([point_ids for _, point_ids in moved])
+                self._add_to_buffer(cluster_name, points, point_ids)
+        return True
+
+    def drain_into(self, scatter: ScatterData) -> bool:
+        """Move the pending batches into the ring buffers (see flush()). Returns True if new points were received.
+        The clusters of new streams are added to the scatter (without points, see streamed_points()),
+        and the bounding box of the scatter is expanded if needed.
+        """
+        changed = self.flush()
+        if not self._new_clusters:
+            return changed
+        for cluster_name in self._new_clusters:
+            scatter.get_or_add_cluster(cluster_name)
+        if self._new_bounds is not None:
+            bounds_min, bounds_max = self._new_bounds
+            new_bounding: Bounding = (
+                (float(bounds_min[0]), float(bounds_min[1])),
+                (float(bounds_max[0]), float(bounds_max[1])),
+            )
+            scatter.expand_bounding(new_bounding)
+        self._new_clusters = []
+        self._new_bounds = None
+        return True
+
+    def streamed_points(self) -> dict[str, PointsArray]:
+        """The points currently retained for each cluster (from the oldest to the newest)"""
+        return {name: ring_buffer.to_array() for name, ring_buffer in self._buffers.items() if len(ring_buffer) > 0}
+
+    def streamed_ids(self) -> dict[str, IdsArray]:
+        """The ids of the points currently retained for each cluster (in the same order as streamed_points())"""
+        return {name: ring_buffer.ids() for name, ring_buffer in self._buffers.items() if len(ring_buffer) > 0}
+
+    def nb_streamed_points(self, cluster_name: str) -> int:
+        ring_buffer = self._buffers.get(cluster_name)
+        return 0 if ring_buffer is None else len(ring_buffer)
+
+    def rename_cluster(self, old_name: str, new_name: str) -> None:
+        """Move the streamed points of a cluster to a new name (merging them if a cluster with this name exists).
+        The batches pushed later under the old name go to the new name.
+        """
+        if old_name == new_name:
+            return
+        # Aliases are kept flat (renamed name -> current name), and a name which is in use again is not an alias
+        self._aliases.pop(new_name, None)
+        for alias, name in self._aliases.items():
+            if name == old_name:
+                self._aliases[alias] = new_name
+        self._aliases[old_name] = new_name
+
+        ring_buffer = self._buffers.pop(old_name, None)
+        if ring_buffer is not None and len(ring_buffer) > 0:
+            if new_name in self._buffers:
+                self._buffers[new_name].extend(ring_buffer.to_array(), ring_buffer.ids())
+            else:
+                self._buffers[new_name] = ring_buffer
+        self._new_clusters = [new_name if name == old_name else name for name in self._new_clusters]
+
+    def clear_cluster(self, cluster_name: str) -> None:
+        """Forget the streamed points of a cluster (including the pending ones)"""
+        names = {cluster_name} | {alias for alias, name in self._aliases.items() if name == cluster_name}
+        with self._lock:
+            for name in names:
+                self._pending.pop(name, None)
+                self._pending_counts.pop(name, None)
+        self._buffers.pop(cluster_name, None)
+
+    def merged_scatter(self, scatter: ScatterData) -> ScatterData:
+        """A copy of the scatter, where the streamed points are appended to the user points
+        (e.g. to feed scatter.data_as_pandas() with all the points). This is costly: do not call it at each frame.
+        """
+        r = scatter.model_copy(deep=True)
+        for cluster_name, points in self.streamed_points().items():
+            cluster = r.get_or_add_cluster(cluster_name)
+            cluster.points = cluster.points + [(x, y) for x, y in points.tolist()]
+        return r
@@ -0,0 +1,130 @@
+"""Side-by-side comparison of all the registered decision strategies (see decision_boundary.register_strategy).
+
+All the strategies are fitted in parallel, in worker threads, on the same snapshot of the data.
+The GUI never waits for them: each tile of the panel is updated as soon as its result arrives.
+
+Submissions are debounced: submit() only records the latest snapshot, which is evaluated by gui()
+(i.e. only while the panel is displayed) once the data did not change for `debounce_seconds`,
+and once the evaluations of the previous snapshot are finished.
+
+Note: worker threads are used instead of processes, because the strategy factories registered by the user
+may not be picklable (e.g. lambdas), and because the heavy parts of the sklearn fits release the GIL.
+They are daemon threads, so that closing the application does not wait for a running evaluation.
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import pandas as pd
+from imgui_bundle import imgui, imgui_fig, hello_imgui
+
+from .decision_boundary import (
+    StrategyEvaluation, StrategyFactory, evaluate_strategy, registered_strategies, submit_in_daemon_thread)
+
+
+class StrategyComparison:
+    eps: float
+    cv: int
+    debounce_seconds: float
+    nb_columns: int
+    tile_size_em: float
+    _slots: threading.Semaphore  # limits the number of evaluations running at the same time
+    _pending_df: pd.DataFrame | None = None  # latest snapshot, not evaluated yet
+    _pending_time: float = 0.0
+    _running: dict[str, Future[StrategyEvaluation]]  # strategy name -> evaluation of the current snapshot
+    _results: dict[str, StrategyEvaluation]  # strategy name -> latest result
+    _results_to_refresh: set[str]  # results whose figure was not yet displayed
+    _is_shut_down: bool = False
+
+    def __init__(self, eps: float = 0.1, cv: int = 5, max_workers: int | None = None, debounce_seconds: float = 0.5):
+        self.eps = eps
+        self.cv = cv
+        self.debounce_seconds = debounce_seconds
+        self.nb_columns = 3
+        self.tile_size_em = 14
+        self._slots = threading.Semaphore(max_workers or os.cpu_count() or 1)
+        self._pending_df = None
+        self._pending_time = 0.0
+        self._running = {}
+        self._results = {}
+        self._results_to_refresh = set()
+        self._is_shut_down = False
+
+    def submit(self, df: pd.DataFrame) -> None:
+        """Ask for an evaluation of all the registered strategies on a snapshot of df
+        (see ScatterData.data_as_pandas()). It will start from gui(), see the module docstring.
+        """
+        self._pending_df = df.copy()
+        self._pending_time = time.time()
+
+    def _evaluate(self, name: str, factory: StrategyFactory, df: pd.DataFrame) -> StrategyEvaluation:
+        with self._slots:
+            return evaluate_strategy(name, factory, df, self.eps, self.cv)
+
+    def _start_pending(self) -> None:
+        """Start the evaluation of the pending snapshot, if the data is stable and the previous one is finished"""
+        if self._pending_df is None or self._running or self._is_shut_down:
+            return
+        if time.time() - self._pending_time < self.debounce_seconds:
+            return
+        snapshot = self._pending_df
+        self._pending_df = None
+        for name, factory in registered_strategies().items():
+            self._running[name] = submit_in_daemon_thread(self._evaluate, name, factory, snapshot)
+
+    def _collect_results(self) -> None:
+        """Move the finished evaluations into the results (without blocking)"""
+        for name, future in list(self._running.items()):
+            if future.done():
+                self._results[name] = future.result()
+                self._results_to_refresh.add(name)
+                del self._running[name]
+
+    def is_busy(self) -> bool:
+        return len(self._running) > 0 or self._pending_df is not None
+
+    def shutdown(self) -> None:
+        """Drop the pending snapshot. The running evaluations are not waited for (they run in daemon threads)"""
+        self._is_shut_down = True
+        self._pending_df = None
+
+    # ========================================
+    # GUI
+    # ========================================
+    def _gui_tile(self, name: str) -> None:
+        tile_size = hello_imgui.em_to_vec2(self.tile_size_em, self.tile_size_em)
+        is_pending = name in self._running or self._pending_df is not None
+        result = self._results.get(name)
+
+        imgui.begin_group()
+        imgui.text(name + (" (updating...)" if is_pending else ""))
+        if result is None:
+            imgui.dummy(tile_size)
+        elif result.error is not None:
+            imgui.text_wrapped(f"Error: {result.error}")
+        else:
+            imgui.text(
+                f"CPU time: fit {result.fit_cpu_seconds * 1000:.1f} ms, "
+                f"predict {result.predict_cpu_seconds * 1000:.1f} ms")
+            imgui.text(f"cv accuracy: {result.cv_accuracy:.3f}")
+            if result.approximation is not None:
+                imgui.text_wrapped(result.approximation)
+            if result.figure is not None:
+                refresh_image = name in self._results_to_refresh
+                imgui_fig.fig(f"##{name}", result.figure, size=tile_size, refresh_image=refresh_image)
+                self._results_to_refresh.discard(name)
+        imgui.end_group()
+
+    def gui(self) -> None:
+        """Display the tiled panel of the strategies (one tile per registered strategy)"""
+        self._collect_results()
+        self._start_pending()
+        imgui.set_next_item_width(hello_imgui.em_size(6))
+        _, self.nb_columns = imgui.slider_int("Columns", self.nb_columns, 1, 6)
+        for i, name in enumerate(registered_strategies()):
+            if i % self.nb_columns != 0:
+                imgui.same_line()
+            imgui.push_id(name)
+            self._gui_tile(name)
+            imgui.pop_id()
@@ -0,0 +1,44 @@
+"""Tests of the loading of saved states by the batch renderer (run from the scatter folder with `python -m pytest tests`)"""
+import json
+from pathlib import Path
+
+from scatter_widget_bundle.batch_render import _list_saved_states, load_saved_state
+from scatter_widget_bundle.scatter_data import ScatterData
+
+
+def _input(data: dict) -> dict:
+    return {"data": data}
+
+
+def test_strategy_and_eps_come_from_the_boundary_node(tmp_path: Path) -> None:
+    scatter = ScatterData.make_default()
+    user_settings = {
+        "user_inputs": {
+            "functions_nodes": {
+                "scatter_source": {
+                    "data": _input({"type": "Pydantic", "value": scatter.model_dump(mode="json")}),
+                },
+                "plot_boundary": {
+                    "strategy": _input({"type": "Enum", "class": "DecisionStrategy", "value_name": "decision_tree"}),
+                    "eps": _input({"type": "Primitive", "value": 0.5}),
+                },
+                # saved after plot_boundary: its eps must not be used for the boundary
+                "compare_strategies": {
+                    "eps": _input({"type": "Primitive", "value": 0.1}),
+                },
+            }
+        }
+    }
+    path = tmp_path / "app.fiat_user.json"
+    path.write_text(json.dumps(user_settings))
+
+    state = load_saved_state(path)
+    assert state.strategy_name == "decision_tree"
+    assert state.eps == 0.5
+    assert len(state.scatter.classes) == len(scatter.classes)
+
+
+def test_node_editor_layouts_are_not_saved_states(tmp_path: Path) -> None:
+    (tmp_path / "app.node_editor.json").write_text(json.dumps({"nodes": {}, "selection": None}))
+    (tmp_path / "scatter.json").write_text(ScatterData.make_default().model_dump_json())
+    assert [path.name for path in _list_saved_states(tmp_path)] == ["scatter.json"]
@@ -0,0 +1,175 @@
+"""Tests of the live ingestion (run from the scatter folder with `python -m pytest tests`)"""
+import io
+from collections import deque
+
+import numpy as np
+import pytest
+
+from scatter_widget_bundle.scatter_data import ScatterData
+from scatter_widget_bundle.scatter_stream import ClusterRingBuffer, ScatterStream
+
+
+def _points(start: int, count: int) -> np.ndarray:
+    """count points, numbered from start (x = number, y = -number), so that their order can be checked"""
+    values = np.arange(start, start + count, dtype=np.float64)
+    return np.column_stack([values, -values])
+
+
+def test_ring_buffer_wraps_around() -> None:
+    ring_buffer = ClusterRingBuffer(5)
+    ring_buffer.extend(_points(0, 3))
+    ring_buffer.extend(_points(3, 4))  # wraps: the 2 oldest points are overwritten
+    assert len(ring_buffer) == 5
+    np.testing.assert_array_equal(ring_buffer.to_array(), _points(2, 5))
+    ring_buffer.extend(_points(7, 2))
+    np.testing.assert_array_equal(ring_buffer.to_array(), _points(4, 5))
+
+
+@pytest.mark.parametrize("nb_points_before", [0, 2, 5])
+def test_ring_buffer_exact_capacity_batch(nb_points_before: int) -> None:
+    ring_buffer = ClusterRingBuffer(5)
+    ring_buffer.extend(_points(0, nb_points_before))
+    ring_buffer.extend(_points(100, 5))
+    np.testing.assert_array_equal(ring_buffer.to_array(), _points(100, 5))
+
+
+@pytest.mark.parametrize("nb_points_before", [0, 3])
+def test_ring_buffer_oversize_batch(nb_points_before: int) -> None:
+    ring_buffer = ClusterRingBuffer(5)
+    ring_buffer.extend(_points(0, nb_points_before))
+    ring_buffer.extend(_points(100, 12))
+    np.testing.assert_array_equal(ring_buffer.to_array(), _points(107, 5))
+    ring_buffer.extend(_points(200, 1))
+    np.testing.assert_array_equal(ring_buffer.to_array(), np.concatenate([_points(108, 4), _points(200, 1)]))
+
+
+def test_ring_buffer_matches_deque() -> None:
+    rng = np.random.default_rng(0)
+    capacity = 7
+    ring_buffer = ClusterRingBuffer(capacity)
+    expected: deque[tuple[float, float]] = deque(maxlen=capacity)
+    start = 0
+    for _ in range(200):
+        batch = _points(start, int(rng.integers(0, 2 * capacity)))
+        start += len(batch)
+        ring_buffer.extend(batch)
+        expected.extend(map(tuple, batch))
+        assert len(ring_buffer) == len(expected)
+        np.testing.assert_array_equal(ring_buffer.to_array().reshape(-1, 2), np.array(expected).reshape(-1, 2))
+
+
+def test_push_trims_pending_while_the_gui_lags() -> None:
+    stream = ScatterStream(retention=10)
+    for start in range(0, 100, 7):
+        stream.push("a", _points(start, 7))
+        assert stream._pending_counts["a"] <= 2 * stream.retention
+    scatter = ScatterData()
+    assert stream.drain_into(scatter)
+    np.testing.assert_array_equal(stream.streamed_points()["a"], _points(95, 10))
+    assert [cluster.name for cluster in scatter.classes] == ["a"]
+    assert not stream.drain_into(scatter)
+
+
+def test_push_drops_non_finite_points() -> None:
+    stream = ScatterStream(retention=10)
+    stream.push("a", [[0, 0], [np.nan, 1], [2, np.inf], [3, 3]])
+    stream.push("b", [[np.nan, np.nan]])
+    scatter = ScatterData()
+    stream.drain_into(scatter)
+    np.testing.assert_array_equal(stream.streamed_points()["a"], [[0, 0], [3, 3]])
+    assert [cluster.name for cluster in scatter.classes] == ["a"]
+    assert np.isfinite(np.asarray(scatter.bounding)).all()
+
+
+@pytest.mark.parametrize("cluster_name, points", [
+    (1, [[0, 0]]),
+    (None, [[0, 0]]),
+    ("a", [[0, 0, 0]]),
+    ("a", [["x", 0]]),
+])
+def test_push_rejects_invalid_batches(cluster_name: object, points: list) -> None:
+    stream = ScatterStream()
+    with pytest.raises(ValueError):
+        stream.push(cluster_name, points)  # type: ignore
+    assert not stream.drain_into(ScatterData())
+
+
+def test_feed_from_lines_skips_invalid_lines() -> None:
+    lines = "\n".join([
+        '{"cluster": "a", "points": [[0, 0], [1, 1]]}',
+        'not json',
+        '{"points": [[0, 0]]}',
+        '{"cluster": 1, "points": [[0, 0]]}',
+        '{"cluster": "a", "points": [[0, 0, 0]]}',
+        '{"cluster": "b", "points": [[2, 2]]}',
+    ])
+    stream = ScatterStream()
+    stream.feed_from_lines(io.StringIO(lines)).join(timeout=5)
+    scatter = ScatterData()
+    stream.drain_into(scatter)
+    assert [cluster.name for cluster in scatter.classes] == ["a", "b"]
+    assert stream.nb_streamed_points("a") == 2
+    assert stream.nb_streamed_points("b") == 1
+
+
+def test_ring_buffer_keeps_the_ids_with_the_points() -> None:
+    ring_buffer = ClusterRingBuffer(5)
+    ring_buffer.extend(_points(0, 3), np.arange(0, 3))
+    ring_buffer.extend(_points(3, 4), np.arange(3, 7))
+    np.testing.assert_array_equal(ring_buffer.ids(), np.arange(2, 7))
+    points, ids = ring_buffer.remove_ids(np.array([3, 5, 100]))
+    np.testing.assert_array_equal(ids, [3, 5])
+    np.testing.assert_array_equal(points, np.concatenate([_points(3, 1), _points(5, 1)]))
+    np.testing.assert_array_equal(ring_buffer.ids(), [2, 4, 6])
+    np.testing.assert_array_equal(ring_buffer.to_array(), np.concatenate([_points(2, 1), _points(4, 1), _points(6, 1)]))
+
+
+def test_relabel_moves_points_by_id() -> None:
+    stream = ScatterStream(retention=10)
+    stream.push("a", _points(0, 4), ids=[0, 1, 2, 3])
+    stream.push("b", _points(4, 2), ids=[4, 5])
+    stream.relabel([1, 4], "c")  # applied after the batches pushed before it
+    scatter = ScatterData()
+    assert stream.drain_into(scatter)
+    assert [cluster.name for cluster in scatter.classes] == ["a", "b", "c"]
+    ids = stream.streamed_ids()
+    np.testing.assert_array_equal(ids["a"], [0, 2, 3])
+    np.testing.assert_array_equal(ids["b"], [5])
+    np.testing.assert_array_equal(np.sort(ids["c"]), [1, 4])
+
+    stream.relabel([1], "a")
+    assert stream.drain_into(scatter)
+    np.testing.assert_array_equal(stream.streamed_ids()["a"], [0, 2, 3, 1])
+    np.testing.assert_array_equal(stream.streamed_ids()["c"], [4])
+
+
+def test_rename_cluster_keeps_its_points_and_later_batches() -> None:
+    stream = ScatterStream(retention=10)
+    stream.push("a", _points(0, 3))
+    scatter = ScatterData()
+    stream.drain_into(scatter)
+    scatter.classes[0].name = "b"  # as done by ScatterPresenter
+    stream.rename_cluster("a", "b")
+    assert stream.nb_streamed_points("b") == 3
+    assert stream.nb_streamed_points("a") == 0
+
+    stream.push("a", _points(3, 2))  # the producer still uses the old name
+    stream.drain_into(scatter)
+    assert [cluster.name for cluster in scatter.classes] == ["b"]
+    np.testing.assert_array_equal(stream.streamed_points()["b"], _points(0, 5))
+
+    stream.clear_cluster("b")
+    stream.push("a", _points(5, 1))
+    stream.drain_into(scatter)
+    np.testing.assert_array_equal(stream.streamed_points()["b"], _points(5, 1))
+
+
+def test_flush_reports_the_clusters_at_the_next_drain() -> None:
+    stream = ScatterStream(retention=10)
+    stream.push("a", [[5, 5]])
+    assert stream.flush()
+    assert stream.nb_streamed_points("a") == 1
+    scatter = ScatterData()
+    assert stream.drain_into(scatter)
+    assert [cluster.name for cluster in scatter.classes] == ["a"]
+    assert scatter.bounding == ((0, 0), (5, 5))